@@ -1,15 +1,54 @@
+import asyncio
+
 from aiogram import executor
 
+from src.data import settings
 from src.handlers import register_all as register_all_handlers
 from src.loader import dp
+from src.services import executor as export_executor
+from src.services.database import api
+from src.services.database.config import engine
+from src.services.database.storage import PostgresStorage
+from src.services.database.tools import warmup_pool
+from src.utils import metrics
+from src.utils import webhook
+from src.utils import workers
 from src.utils.set_bot_commands import set_default_commands
 
 
 async def on_startup(dispatcher):
     register_all_handlers()
 
+    if settings.DB_WARMUP:
+        await warmup_pool(api.warmup, settings.DB_POOL_SIZE)
+    if settings.METRICS_LOG_INTERVAL > 0:
+        asyncio.create_task(metrics.log_periodically(settings.METRICS_LOG_INTERVAL))
+    if isinstance(dispatcher.storage, PostgresStorage) and settings.FSM_STATE_TTL:
+        asyncio.create_task(
+            dispatcher.storage.cleanup_periodically(settings.FSM_CLEANUP_INTERVAL)
+        )
+
     await set_default_commands(dispatcher)
+    if settings.BOT_MODE == "webhook":
+        await webhook.set_webhook(dispatcher)
+
+
+async def on_shutdown(dispatcher):
+    export_executor.shutdown()
+    await engine.dispose()
 
 
 if __name__ == "__main__":
-    executor.start_polling(dp, on_startup=on_startup)
+    if settings.BOT_MODE == "webhook":
+        # webhook route is added by app, executor only runs startup and shutdown
+        executor.set_webhook(
+            dp,
+            webhook_path=None,
+            on_startup=on_startup,
+            on_shutdown=on_shutdown,
+            web_app=webhook.create_app(dp),
+        ).run_app(host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT)
+    elif settings.WORKERS > 1:
+        workers.run_polling(settings.WORKERS, on_startup, on_shutdown)
+    else:
+        executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown)
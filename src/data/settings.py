@@ -13,6 +13,71 @@ env.read_env(str(ENV_FILE.absolute()))
 BOT_TOKEN = env.str("BOT_TOKEN")
 POSTGRESQL_URI = env.str("POSTGRESQL_URI")
 
+BOT_MODE = env.str("BOT_MODE", "polling")  # polling or webhook
+# public url telegram sends updates to, for ex. https://example.com, empty keeps
+# webhook registered outside of bot
+WEBHOOK_HOST = env.str("WEBHOOK_HOST", "")
+WEBHOOK_PATH = env.str("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = env.str("WEBHOOK_SECRET", "")  # A-Z, a-z, 0-9, _ and -
+WEBAPP_HOST = env.str("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = env.int("WEBAPP_PORT", 8080)
+
+# processes handling updates, more than 1 polls in parent process and shards
+# updates by chat to workers
+WORKERS = env.int("WORKERS", 1)
+# bot instances sharing database, for ex. webhook ones behind load balancer
+INSTANCES = env.int("INSTANCES", 1)
+# processes handling updates of the bot, caches, versioned keyboards and outbound
+# limits are kept in every process and don't see other processes
+PROCESSES = WORKERS * INSTANCES
+
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = env.int("DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", 30)  # seconds to wait for connection
+DB_POOL_RECYCLE = env.int("DB_POOL_RECYCLE", 1800)  # seconds, -1 disables
+DB_POOL_PRE_PING = env.bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_CACHE_SIZE = env.int("DB_STATEMENT_CACHE_SIZE", 100)  # per connection
+DB_WARMUP = env.bool("DB_WARMUP", True)
+
+# updates processed at once, each of them may hold a database connection, so it
+# can't exceed pool capacity. Updates of one chat are processed in order, so answer
+# to a button waits until listing running in the same chat is sent. 0 leaves
+# ordering to aiogram
+UPDATE_WORKERS = env.int("UPDATE_WORKERS", DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+METRICS_LOG_INTERVAL = env.int("METRICS_LOG_INTERVAL", 0)  # seconds, 0 disables
+
+# seconds rows and versioned keyboards stay cached, 0 disables cache. Caches are
+# per process, so they are disabled for several processes
+CACHE_TTL = env.int("CACHE_TTL", 60) if PROCESSES == 1 else 0
+CACHE_SIZE = env.int("CACHE_SIZE", 1000)  # rows per model
+
+# json or postgres, several processes need postgres
+FSM_STORAGE = env.str("FSM_STORAGE", "json" if PROCESSES == 1 else "postgres")
+FSM_STATE_TTL = env.int("FSM_STATE_TTL", 24 * 60 * 60)  # seconds, 0 disables
+FSM_CLEANUP_INTERVAL = env.int("FSM_CLEANUP_INTERVAL", 60 * 60)  # seconds
+
+# directory for compiled templates cache, empty disables it
+TEMPLATES_BYTECODE_CACHE_DIR = env.str("TEMPLATES_BYTECODE_CACHE_DIR", "")
+
+EXECUTOR_WORKERS = env.int("EXECUTOR_WORKERS", 2)  # processes for CPU bound work
+EXCEL_BATCH_SIZE = env.int("EXCEL_BATCH_SIZE", 5000)  # rows sent to worker at once
+
+OUTBOUND_RATE = env.float("OUTBOUND_RATE", 30)  # messages per second for all chats
+# limits of one chat are per process, chat getting messages from several processes,
+# like admin notified of updates of other chats, relies on flood limit retries
+OUTBOUND_CHAT_RATE = env.float("OUTBOUND_CHAT_RATE", 1)  # messages per second
+OUTBOUND_CHAT_BURST = env.int("OUTBOUND_CHAT_BURST", 3)
+OUTBOUND_GROUP_RATE_PER_MINUTE = env.float("OUTBOUND_GROUP_RATE_PER_MINUTE", 20)
+OUTBOUND_GROUP_BURST = env.int("OUTBOUND_GROUP_BURST", 3)
+OUTBOUND_MAX_RETRIES = env.int("OUTBOUND_MAX_RETRIES", 3)  # retries on flood limit
+
+ALBUM_SIZE = 10  # max photos in telegram media group
+BROADCAST_CONCURRENCY = env.int("BROADCAST_CONCURRENCY", 50)
+
+USERS_PAGE_SIZE = env.int("USERS_PAGE_SIZE", 20)  # users in one page of picker
+USERS_SEARCH_LIMIT = 50  # max results of telegram inline query
+
 BET_20_PARTNER_ID = 1
 MISHA_PARTNER_ID = 2
 BET_20_SALARY_FRACTION = 0.3
@@ -1,9 +1,11 @@
 from . import callback_query
 from . import commands
+from . import inline_query
 from . import messages
 
 __all__ = [
     "commands",
     "callback_query",
+    "inline_query",
     "messages",
 ]
@@ -1,5 +1,3 @@
-import datetime
-
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 
@@ -8,28 +6,24 @@ from src.keyboards.inline import (
     get_select_partner_keyboard,
     get_select_currency_keyboard,
 )
-from src.data import enums, settings
+from src.data import enums
 from src.services.forms.admin import manage_partners_form, manage_salary_form
 from src.loader import dp, bot
 from src.states import States
+from src.utils.outbound import Priority
 from src.utils.send import send_message
 from src.services.templates import render_template
 from src.keyboards.inline.callbacks import (
     accept_new_user,
     select_user,
+    users_page,
     select_partner,
     select_currency,
     delete_report,
+    delete_album_report,
     confirm_deletion,
 )
-from src.services.calc import (
-    get_common_balance,
-    get_common_misha_balance,
-    get_common_salary,
-    get_common_total_charity,
-    get_common_charity,
-    get_common_bet20_salary,
-)
+from src.services.calc import balances_snapshot
 from src.services.forms.admin import (
     accept_new_user_form,
     start_form,
@@ -45,23 +39,17 @@ from src.services.forms.admin import (
     current_month_form,
     balance_type_form,
 )
+from src.services import ledger
 from src.services.database.api import (
-    create_user,
-    create_salary,
-    create_bet20_salary,
-    create_charity,
     get_users,
-    get_partners,
-    get_not_admin_users,
-    get_admin_users,
     get_salaries,
     get_bet20_salaries,
-    deactive_report,
-    get_charities,
-    get_reports_by_interval,
-    get_operations_by_interval,
+    get_reports_statistic,
+    reset_amounts,
+    get_report_details,
+    iter_operation_details_by_interval,
 )
-from src.services.database.models import User, Partner, Salary, Bet20Salary, Report
+from src.services.database.models import User, Partner, Salary, Bet20Salary, Charity
 from src.utils.parse import get_current_month_interval
 
 
@@ -79,19 +67,14 @@ async def handle_reports_statistic_date_month(
         await send_message(render_template("invalid_interval.j2"))
         return
 
-    reports = await get_reports_by_interval(interval.start, interval.end)
-    common_turnover = 0
-    common_profit = 0
-    for r in reports:
-        common_turnover += r.amount
-        common_profit += r.profit()
+    statistic = await get_reports_statistic(interval.start, interval.end)
     await send_message(
         render_template(
             "admin/reports_statistic.j2",
             context={
-                "turnover": common_turnover,
-                "profit": common_profit,
-                "count": len(reports),
+                "turnover": statistic.turnover,
+                "profit": statistic.profit,
+                "count": statistic.count,
             },
         )
     )
@@ -111,21 +94,18 @@ async def handle_operations_date_month(
     if interval is None:
         await send_message(render_template("invalid_interval.j2"))
         return
-    operations = await get_operations_by_interval(interval.start, interval.end)
-
-    if len(operations) == 0:
-        await send_message(render_template("admin/no_operations.j2"))
-        await state.reset_state(with_data=True)
-        return
-
-    for o in operations:
-        user = await User.get(id=o.user)
+    count = 0
+    async for o in iter_operation_details_by_interval(interval.start, interval.end):
+        count += 1
         await send_message(
             render_template(
                 "admin/operation.j2",
-                context={"operation": o, "username": user.username},
+                context={"operation": o.operation, "username": o.user.username},
             ),
+            priority=Priority.BULK,
         )
+    if count == 0:
+        await send_message(render_template("admin/no_operations.j2"))
     await state.reset_state(with_data=True)
 
 
@@ -141,6 +121,47 @@ async def handle_delete_report(
     )
 
 
+@dp.callback_query_handler(users_page.filter(), is_admin=True, state="*")
+async def handle_users_page(
+    query: types.CallbackQuery, callback_data: dict, state: FSMContext
+):
+    await query.answer()
+    is_admin = callback_data.get("is_admin", "")
+    user_id = int(callback_data.get("id", 0))
+    direction = callback_data.get("direction")
+    keyboard = await get_select_users_keyboard(
+        is_admin=None if is_admin == "" else bool(int(is_admin)),
+        after=user_id if direction == "next" else None,
+        before=user_id if direction == "prev" else None,
+    )
+    await query.message.edit_reply_markup(keyboard)
+
+
+@dp.callback_query_handler(delete_album_report.filter(), is_admin=True, state="*")
+async def handle_delete_album_report(
+    query: types.CallbackQuery, callback_data: dict, state: FSMContext
+):
+    await query.answer()
+    details = await get_report_details(int(callback_data.get("report_id", 0)))
+    if details is None:  # already deleted
+        return
+
+    await send_message(
+        render_template(
+            "admin/report.j2",
+            context={
+                "report": details.report,
+                "partner": details.partner,
+                "user": details.user,
+            },
+        ),
+        reply_markup=confirm_deletion_form.get_inline_keyboard(
+            callback_data=confirm_deletion,
+            callback_data_args={"report_id": details.report.id},
+        ),
+    )
+
+
 @dp.callback_query_handler(confirm_deletion.filter(), state="*")
 async def handle_confirm_deletion(
     query: types.CallbackQuery, callback_data: dict, state: FSMContext
@@ -151,49 +172,7 @@ async def handle_confirm_deletion(
     match option_id:
         case confirm_deletion_form.yes:
             await query.message.delete()
-            report = await Report.get(id=report_id)
-            user = await User.get(id=report.user)
-            salary = await user.get_salary()
-            salary_percent = report.salary_percent
-
-            if report.partner == settings.BET_20_PARTNER_ID:
-                salary = await user.get_bet20_salary()
-                update_amount = report.profit() * settings.BET_20_SALARY_FRACTION
-                await salary.update(
-                    amount=salary.amount - update_amount,
-                    total_amount=salary.total_amount - update_amount,
-                )
-            else:
-                salary = await user.get_salary()
-                salary_fraction = salary_percent / 100
-
-                if report.erroneous:
-                    fine_amount = report.amount * 3 * salary_fraction
-                    await salary.update(
-                        amount=salary.amount + fine_amount,
-                        total_amount=salary.total_amount + fine_amount,
-                    )
-                else:
-                    update_amount = report.amount * salary_fraction
-                    await salary.update(
-                        amount=salary.amount - update_amount,
-                        total_amount=salary.total_amount - update_amount,
-                    )
-
-            # update user balance to report profit
-            await user.update(balance=user.balance - float(report.profit()))
-            if report.partner == settings.MISHA_PARTNER_ID:
-                await user.update(
-                    misha_balance=user.misha_balance - (float(report.profit()) * 0.5)
-                )
-            # update charity balance
-            charity = await user.get_charity()
-            update_amount = report.amount * settings.CHARITY_FRACTION
-            await charity.update(
-                amount=charity.amount - update_amount,
-                total_amount=charity.total_amount - update_amount,
-            )
-            await deactive_report(report_id)
+            await ledger.reverse_report(report_id)
         case confirm_deletion_form.no:
             await query.message.edit_reply_markup(
                 delete_report_form.get_inline_keyboard(
@@ -225,7 +204,7 @@ async def handle_manage_partners_action(
             )
             await state.set_state(States.Admin.Other.ManagePartners.Add.name)
         case manage_partners_form.remove:
-            keyboard = get_select_partner_keyboard(await get_partners())
+            keyboard = await get_select_partner_keyboard()
             await send_message(
                 render_template("admin/partner.j2"), reply_markup=keyboard
             )
@@ -265,10 +244,7 @@ async def handle_accept_new_user_form(
     match option_id:
         case accept_new_user_form.accept:
             username = (await bot.get_chat(user_id)).username
-            await create_user(user_id, username)
-            await create_salary(user_id)
-            await create_bet20_salary(user_id)
-            await create_charity(user_id)
+            await ledger.accept_user(user_id, username)
             await send_message(
                 render_template("membership_request_accepted.j2"), user_id=user_id
             )
@@ -412,16 +388,14 @@ async def handle_remove_user_salary_user(
     user_id = int(callback_data.get("id", 0))
     data = await state.get_data()
     if data.get("partner") == enums.SalaryPartner.DEFAULT.value:
-        salary = await Salary.get(user=user_id)
+        model = Salary
         partner_name = None
     else:
-        salary = await Bet20Salary.get(user=user_id)
+        model = Bet20Salary
         partner_name = "Бет 2.0"
-    if salary.amount > 0:
-        amount = salary.amount
-        await salary.update(amount=0, last_debiting_at=datetime.datetime.now())
-        user = await User.get(id=salary.user)
-        await user.update(balance=user.balance - amount)
+    paid = await ledger.pay_salaries(model, user_id)
+    if paid:
+        ((user, amount),) = paid
         await send_message(
             render_template(
                 "salary_set_alert.j2",
@@ -537,9 +511,7 @@ async def handle_remove_chairty(
 ):
     await query.message.delete_reply_markup()
 
-    charities = await get_charities()
-    for c in charities:
-        await c.update(amount=0, last_debiting_at=datetime.datetime.now())
+    await reset_amounts(Charity)
     await send_message(render_template("admin/charity_removed.j2"))
     await state.reset_state(with_data=True)
 
@@ -555,14 +527,13 @@ async def handle_manage_charity(
 
     match option_id:
         case manage_charity_form.statistic:
-            common_total_charity = await get_common_total_charity()
-            common_charity = await get_common_charity()
+            snapshot = await balances_snapshot()
             await send_message(
                 render_template(
                     "admin/charity_statistic.j2",
                     context={
-                        "common_total": common_total_charity,
-                        "common": common_charity,
+                        "common_total": snapshot.total_charity,
+                        "common": snapshot.charity,
                     },
                 ),
                 reply_markup=remove_charity_form.get_inline_keyboard(),
@@ -581,10 +552,10 @@ async def handle_manage_salary(
     await query.message.delete_reply_markup()
     option_id = callback_data.get("id")
     data = await state.get_data()
-    salaries_func = (
-        get_salaries
+    model = (
+        Salary
         if data.get("partner") == enums.SalaryPartner.DEFAULT.value
-        else get_bet20_salaries
+        else Bet20Salary
     )
     partner_name = (
         None if data.get("partner") == enums.SalaryPartner.DEFAULT.value else "Бет 2.0"
@@ -592,14 +563,7 @@ async def handle_manage_salary(
 
     match option_id:
         case manage_salary_form.remove_everyone:
-            salaries = await salaries_func()
-            for s in salaries:
-                if s.amount <= 0:
-                    continue
-                amount = s.amount
-                await s.update(amount=0, last_debiting_at=datetime.datetime.now())
-                user = await User.get(id=s.user)
-                await user.update(balance=user.balance - amount)
+            for user, amount in await ledger.pay_salaries(model):
                 await send_message(
                     render_template(
                         "salary_set_alert.j2",
@@ -609,17 +573,17 @@ async def handle_manage_salary(
                             "currency": await user.get_currency(),
                         },
                     ),
-                    user_id=s.user,
+                    user_id=user.id,
                 )
             await send_message(render_template("admin/salary_removed.j2"))
         case manage_salary_form.remove_user:
-            select_user_keyboard = await get_select_users_keyboard(await get_users())
+            select_user_keyboard = await get_select_users_keyboard()
             await send_message(
                 render_template("admin/user.j2"), reply_markup=select_user_keyboard
             )
             await state.set_state(States.Admin.Accounting.RemoveUserSalary.user)
         case manage_salary_form.set_user:
-            select_user_keyboard = await get_select_users_keyboard(await get_users())
+            select_user_keyboard = await get_select_users_keyboard()
             await send_message(
                 render_template("admin/user.j2"), reply_markup=select_user_keyboard
             )
@@ -637,7 +601,7 @@ async def handle_accounting_form(
     match option_id:
         case accounting_form.set_misha_balance:
             await query.message.delete_reply_markup()
-            select_user_keyboard = await get_select_users_keyboard(await get_users())
+            select_user_keyboard = await get_select_users_keyboard()
             await send_message(
                 render_template("admin/user.j2"), reply_markup=select_user_keyboard
             )
@@ -669,29 +633,29 @@ async def handle_balances_form(
     match option_id:
         case balances_form.common:
             users = await get_users()
-            common_balance = round(await get_common_balance(), 2)
+            snapshot = await balances_snapshot()
             await send_message(
                 render_template(
                     "admin/common_balance.j2",
-                    context={"balance": common_balance, "users": users},
+                    context={"balance": snapshot.balance, "users": users},
                 )
             )
         case balances_form.misha:
             users = await get_users()
-            common_balance = round(await get_common_misha_balance(), 2)
+            snapshot = await balances_snapshot()
             await send_message(
                 render_template(
                     "admin/common_misha_balance.j2",
-                    context={"balance": common_balance, "users": users},
+                    context={"balance": snapshot.misha_balance, "users": users},
                 )
             )
         case balances_form.business:
-            common_balance = round(await get_common_balance(), 2)
-            common_misha_balance = abs(round(await get_common_misha_balance(), 2))
-            common_salary = abs(round(await get_common_salary(), 2))
-            common_bet20_salary = abs(round(await get_common_bet20_salary(), 2))
+            snapshot = await balances_snapshot()
+            common_misha_balance = abs(snapshot.misha_balance)
+            common_salary = abs(snapshot.salary)
+            common_bet20_salary = abs(snapshot.bet20_salary)
             total = (
-                common_balance
+                snapshot.balance
                 - common_misha_balance
                 - common_salary
                 - common_bet20_salary
@@ -700,7 +664,7 @@ async def handle_balances_form(
                 render_template(
                     "admin/business_balance.j2",
                     context={
-                        "balance": common_balance,
+                        "balance": snapshot.balance,
                         "misha_balance": common_misha_balance,
                         "salary": common_salary,
                         "bet20_salary": common_bet20_salary,
@@ -721,14 +685,14 @@ async def handle_reports_form(
 
     match option_id:
         case reports_form.user_reports:
-            select_user_keyboard = await get_select_users_keyboard(await get_users())
+            select_user_keyboard = await get_select_users_keyboard()
             await send_message(
                 render_template("admin/user.j2"), reply_markup=select_user_keyboard
             )
             await state.set_state(States.Admin.Reports.User.user)
         case reports_form.partner_reports:
-            select_partner_keyboard = get_select_partner_keyboard(
-                await get_partners(), all_partner_button=True
+            select_partner_keyboard = await get_select_partner_keyboard(
+                all_partner_button=True
             )
             await send_message(
                 render_template("admin/partner.j2"),
@@ -756,14 +720,13 @@ async def handle_other_form(
 
     match option_id:
         case other_form.issue_balance:
-            select_user_keyboard = await get_select_users_keyboard(await get_users())
+            select_user_keyboard = await get_select_users_keyboard()
             await send_message(
                 render_template("admin/user.j2"), reply_markup=select_user_keyboard
             )
             await state.set_state(States.Admin.Other.IssueBalance.user)
         case other_form.create_operation:
-            users = await get_users()
-            keyboard = await get_select_users_keyboard(users)
+            keyboard = await get_select_users_keyboard()
             await send_message(render_template("admin/user.j2"), reply_markup=keyboard)
             await state.set_state(States.Admin.Other.CreateOperation.user)
         case other_form.get_operations:
@@ -773,23 +736,19 @@ async def handle_other_form(
             )
             await state.set_state(States.Admin.Other.Operations.date)
         case other_form.add_admin:
-            not_admin_users = await get_not_admin_users()
-            keyboard = await get_select_users_keyboard(not_admin_users)
+            keyboard = await get_select_users_keyboard(is_admin=False)
             await send_message(render_template("admin/user.j2"), reply_markup=keyboard)
             await state.set_state(States.Admin.Other.AddAdmin.user)
         case other_form.remove_admin:
-            admin_users = await get_admin_users()
-            keyboard = await get_select_users_keyboard(admin_users)
+            keyboard = await get_select_users_keyboard(is_admin=True)
             await send_message(render_template("admin/user.j2"), reply_markup=keyboard)
             await state.set_state(States.Admin.Other.RemoveAdmin.user)
         case other_form.remove_user:
-            users = await get_users()
-            keyboard = await get_select_users_keyboard(users)
+            keyboard = await get_select_users_keyboard()
             await send_message(render_template("admin/user.j2"), reply_markup=keyboard)
             await state.set_state(States.Admin.Other.RemoveUser.user)
         case other_form.set_currency:
-            users = await get_users()
-            keyboard = await get_select_users_keyboard(users)
+            keyboard = await get_select_users_keyboard()
             await send_message(render_template("admin/user.j2"), reply_markup=keyboard)
             await state.set_state(States.Admin.Other.SetCurrency.user)
         case other_form.manage_partners:
@@ -798,6 +757,9 @@ async def handle_other_form(
                 reply_markup=manage_partners_form.get_inline_keyboard(row_width=2),
             )
             await state.set_state(States.Admin.Other.ManagePartners.action)
+        case other_form.broadcast:
+            await send_message(render_template("admin/broadcast_text.j2"))
+            await state.set_state(States.Admin.Other.Broadcast.text)
         case other_form.back:
             await query.message.edit_reply_markup(start_form.get_inline_keyboard())
 
@@ -1,9 +1,12 @@
 from aiogram import types
 from aiogram.dispatcher import FSMContext
+from src.keyboards.inline import get_user_keyboard
 from src.loader import dp
+from src.services.database.models import User
 from src.utils.send import send_message
 from src.services.forms.admin import start_form, balances_form
 from src.services.templates import render_template
+from src.states import SELECT_USERS_IS_ADMIN
 
 
 @dp.message_handler(commands=["start"], state="*", is_admin=True)
@@ -25,3 +28,22 @@ async def handle_balance(message: types.Message, state: FSMContext):
         ),
         reply_markup=balances_form.get_inline_keyboard(),
     )
+
+
+@dp.message_handler(commands=["select_user"], state="*", is_admin=True)
+async def handle_select_user(message: types.Message, state: FSMContext):
+    # sent by result of users search, picked user continues current state
+    user_id = message.get_args()
+    if not user_id.isdigit():
+        return
+
+    user = await User.get(id=int(user_id))
+    if user is None or not user.active:
+        return
+    is_admin = SELECT_USERS_IS_ADMIN.get(await state.get_state())
+    if is_admin is not None and user.is_admin != is_admin:
+        return
+
+    await send_message(
+        render_template("admin/user.j2"), reply_markup=get_user_keyboard(user)
+    )
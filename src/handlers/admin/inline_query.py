@@ -0,0 +1,26 @@
+from aiogram import types
+from aiogram.dispatcher import FSMContext
+
+from src.data import settings
+from src.loader import dp
+from src.services.database.api import search_users
+from src.states import SELECT_USERS_IS_ADMIN
+
+
+@dp.inline_handler(is_admin=True, state="*")
+async def handle_search_users(query: types.InlineQuery, state: FSMContext):
+    # found user is picked in current state, so only users it accepts are listed
+    users = await search_users(
+        query.query.strip(),
+        settings.USERS_SEARCH_LIMIT,
+        is_admin=SELECT_USERS_IS_ADMIN.get(await state.get_state()),
+    )
+    results = [
+        types.InlineQueryResultArticle(
+            id=str(u.id),
+            title=u.username,
+            input_message_content=types.InputTextMessageContent(f"/select_user {u.id}"),
+        )
+        for u in users
+    ]
+    await query.answer(results, cache_time=5, is_personal=True)
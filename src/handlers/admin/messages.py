@@ -1,26 +1,27 @@
+import asyncio
 import datetime
 
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 
-from src.loader import dp, bot
+from src.loader import dp
 from src.data import enums, settings
 from src.services.database.api import (
-    get_user_reports_by_interval,
-    get_partner_reports_by_interval,
+    get_active_user_ids,
+    iter_report_details_by_interval,
+    iter_operation_details_by_interval,
     create_operation,
-    get_operations_by_interval,
     create_partner,
-    get_reports_by_interval,
+    get_reports_statistic,
 )
 from src.services.database.models import User, Salary, Bet20Salary
 from src.services.templates import render_template
-from src.services.forms.admin import delete_report_form
 from src.services import excel
-from src.keyboards.inline.callbacks import delete_report
+from src.services.database.tools import run_detached
 from src.states import States
 from src.utils.parse import parse_date_interval
-from src.utils.send import send_message
+from src.utils.outbound import Priority
+from src.utils.send import broadcast, send_document, send_message, send_reports
 from src.utils.validate import is_float
 
 
@@ -39,25 +40,20 @@ async def handle_user_reports_date(message: types.Message, state: FSMContext):
         return
     data = await state.get_data()
     user_id = data.get("user_id", 0)
-    reports = await get_user_reports_by_interval(user_id, interval.start, interval.end)
-    if len(reports) == 0:
-        await send_message(render_template("no_reports.j2"))
-
-    for r in reports:
-        partner = await r.get_partner()
-        user = await r.get_user()
-        await send_message(
-            render_template(
-                "admin/report.j2",
-                context={"report": r, "partner": partner, "user": user},
-            ),
-            photo=r.photo,
-            reply_markup=delete_report_form.get_inline_keyboard(
-                callback_data=delete_report, callback_data_args={"report_id": r.id}
+    # reports are read once, export is written while they are sent
+    async with excel.open_reports_excel() as export:
+        count = await send_reports(
+            export.passthrough(
+                iter_report_details_by_interval(
+                    interval.start, interval.end, user=user_id
+                )
             ),
+            "admin/report.j2",
+            deletable=True,
         )
-    excel_file = await excel.create_reports_excel(reports)
-    await bot.send_document(message.chat.id, open(excel_file, "rb"))
+        if count == 0:
+            await send_message(render_template("no_reports.j2"))
+        await send_document(await export.save())
     await state.reset_state(with_data=True)
 
 
@@ -67,8 +63,8 @@ async def handle_charity_report_date(message: types.Message, state: FSMContext):
     if interval is None:
         await send_message(render_template("invalid_interval.j2"))
         return
-    reports = await get_reports_by_interval(interval.start, interval.end)
-    total = round(sum([r.amount * settings.CHARITY_FRACTION for r in reports]), 2)
+    statistic = await get_reports_statistic(interval.start, interval.end)
+    total = round(statistic.turnover * settings.CHARITY_FRACTION, 2)
     await send_message(
         render_template("admin/charity_report.j2", context={"amount": total})
     )
@@ -83,24 +79,17 @@ async def handle_partner_reports_date(message: types.Message, state: FSMContext)
         return
     data = await state.get_data()
     partner_id = data.get("partner_id", -1)
-    if partner_id == -1:
-        reports = await get_reports_by_interval(interval.start, interval.end)
-    else:
-        reports = await get_partner_reports_by_interval(
-            partner_id, interval.start, interval.end
-        )
-    for r in reports:
-        partner = await r.get_partner()
-        user = await r.get_user()
-        await send_message(
-            render_template(
-                "admin/report.j2",
-                context={"report": r, "partner": partner, "user": user},
+    partner = None if partner_id == -1 else partner_id
+    async with excel.open_reports_excel() as export:
+        await send_reports(
+            export.passthrough(
+                iter_report_details_by_interval(
+                    interval.start, interval.end, partner=partner
+                )
             ),
-            photo=r.photo,
+            "admin/report.j2",
         )
-    excel_file = await excel.create_reports_excel(reports)
-    await bot.send_document(message.chat.id, open(excel_file, "rb"))
+        await send_document(await export.save())
     await state.reset_state(with_data=True)
 
 
@@ -111,19 +100,14 @@ async def handle_reports_statistic_date(message: types.Message, state: FSMContex
         await send_message(render_template("invalid_interval.j2"))
         return
 
-    reports = await get_reports_by_interval(interval.start, interval.end)
-    common_turnover = 0
-    common_profit = 0
-    for r in reports:
-        common_turnover += r.amount
-        common_profit += r.profit()
+    statistic = await get_reports_statistic(interval.start, interval.end)
     await send_message(
         render_template(
             "admin/reports_statistic.j2",
             context={
-                "turnover": common_turnover,
-                "profit": common_profit,
-                "count": len(reports),
+                "turnover": statistic.turnover,
+                "profit": statistic.profit,
+                "count": statistic.count,
             },
         )
     )
@@ -137,9 +121,9 @@ async def handle_issue_balance_amount(message: types.Message, state: FSMContext)
         return
 
     data = await state.get_data()
-    user = await User.get(id=data.get("user_id"))
-    await user.update(balance=user.balance + float(message.text))
-    await send_message(render_template("user_balance_issue_alert.j2"), user_id=user.id)
+    user_id = data.get("user_id")
+    await User.increment_where(User.id == user_id, balance=float(message.text))
+    await send_message(render_template("user_balance_issue_alert.j2"), user_id=user_id)
     await send_message(render_template("balance_issued.j2"))
     await state.reset_state(with_data=True)
 
@@ -211,9 +195,10 @@ async def handle_create_operation_reason(message: types.Message, state: FSMConte
     # create operation
     await create_operation(user.id, amount, message.text)
     # update user balance
-    await user.update(balance=user.balance + amount)
+    balance_deltas = {"balance": amount}
     if balance_type == "misha":
-        await user.update(misha_balance=user.misha_balance + amount)
+        balance_deltas["misha_balance"] = amount
+    await user.increment(**balance_deltas)
 
     await send_message(render_template("create_operation/created.j2"))
     await send_message(
@@ -233,18 +218,44 @@ async def handle_operations_date(message: types.Message, state: FSMContext):
     if interval is None:
         await send_message(render_template("invalid_interval.j2"))
         return
-    operations = await get_operations_by_interval(interval.start, interval.end)
-    if len(operations) == 0:
-        await send_message(render_template("admin/no_operations.j2"))
-        await state.reset_state(with_data=True)
-        return
-
-    for o in operations:
-        user = await User.get(id=o.user)
+    count = 0
+    async for o in iter_operation_details_by_interval(interval.start, interval.end):
+        count += 1
         await send_message(
             render_template(
                 "admin/operation.j2",
-                context={"operation": o, "username": user.username},
+                context={"operation": o.operation, "username": o.user.username},
             ),
+            priority=Priority.BULK,
         )
+    if count == 0:
+        await send_message(render_template("admin/no_operations.j2"))
     await state.reset_state(with_data=True)
+
+
+_broadcasts: set[asyncio.Task] = set()
+
+
+@dp.message_handler(state=States.Admin.Other.Broadcast.text, is_admin=True)
+async def handle_broadcast_text(message: types.Message, state: FSMContext):
+    await state.reset_state(with_data=True)
+    await send_message(render_template("admin/broadcast_started.j2"))
+    # broadcast may take minutes, so it doesn't hold update's database session
+    task = run_detached(_broadcast_to_users(message.html_text, message.chat.id))
+    _broadcasts.add(task)
+    task.add_done_callback(_broadcasts.discard)
+
+
+async def _broadcast_to_users(text: str, admin_chat_id: int) -> None:
+    results = await broadcast(await get_active_user_ids(), text)
+    await send_message(
+        render_template(
+            "admin/broadcast_result.j2",
+            context={
+                "sent": sum(r.ok for r in results),
+                "failed": sum(not r.ok for r in results),
+                "deactivated": sum(r.unreachable for r in results),
+            },
+        ),
+        user_id=admin_chat_id,
+    )
@@ -4,9 +4,10 @@ from aiogram.dispatcher import FSMContext
 from src.states import States
 from src.data import settings
 from src.loader import dp
-from src.utils.send import send_message, send_confirm_report
+from src.utils.send import send_message, send_reports, send_confirm_report
 from src.keyboards.inline.callbacks import select_partner, confirm_report
-from src.services.database.api import create_report, get_user_reports_by_interval
+from src.services import ledger
+from src.services.database.api import iter_report_details_by_interval
 from src.services.database.models import Partner, User, Currency
 from src.services.calc import (
     total_bet20_profit_from,
@@ -26,24 +27,14 @@ async def handle_user_reports_today_date(
 ):
     await query.message.delete_reply_markup()
     interval = get_today_interval()
-    reports = await get_user_reports_by_interval(
-        query.from_user.id, interval.start, interval.end
+    count = await send_reports(
+        iter_report_details_by_interval(
+            interval.start, interval.end, user=query.from_user.id
+        ),
+        "report.j2",
     )
-    user = await User.get(id=query.from_user.id)
-    currency = await user.get_currency()
-
-    if len(reports) == 0:
+    if count == 0:
         await send_message(render_template("no_reports.j2"))
-
-    for report in reports:
-        partner = await report.get_partner()
-        await send_message(
-            render_template(
-                "report.j2",
-                context={"report": report, "partner": partner, "currency": currency},
-            ),
-            photo=report.photo,
-        )
     await state.reset_state(with_data=True)
 
 
@@ -70,7 +61,10 @@ async def handle_create_report_partner(
 
 @dp.callback_query_handler(confirm_report.filter(), state=States.CreateReport.confirm)
 async def handle_create_report_confirm(
-    query: types.CallbackQuery, callback_data: dict, state: FSMContext
+    query: types.CallbackQuery,
+    callback_data: dict,
+    state: FSMContext,
+    currency: Currency,
 ):
     await query.message.delete_reply_markup()
     option_id = callback_data.get("id")
@@ -78,57 +72,14 @@ async def handle_create_report_confirm(
     match option_id:
         case confirm_form.accept:
             data = await state.get_data()
-            user = await User.get(id=query.from_user.id)
-            currency = await user.get_currency()
-            salary_percent = data.get("salary_percent", 0)
-            partner = data.get("partner", 0)
-            erroneous = data.get("erroneous", False)
-            report = await create_report(
+            await ledger.post_report(
                 query.from_user.id,
                 data.get("photo", ""),
                 currency.convert_to_eur(data.get("amount", 0)),
                 currency.convert_to_eur(data.get("refund_amount", 0)),
-                salary_percent,
-                partner,
-                erroneous,
-            )
-
-            salary_fraction = salary_percent / 100
-            if partner == settings.BET_20_PARTNER_ID:
-                salary = await user.get_bet20_salary()
-                update_amount = report.amount * salary_fraction
-                await salary.update(
-                    amount=salary.amount + update_amount,
-                    total_amount=salary.total_amount + update_amount,
-                )
-            else:
-                salary = await user.get_salary()
-
-                if erroneous:
-                    fine_amount = report.amount * 3 * salary_fraction
-                    await salary.update(
-                        amount=salary.amount - fine_amount,
-                        total_amount=salary.total_amount - fine_amount,
-                    )
-                else:
-                    update_amount = report.amount * salary_fraction
-                    await salary.update(
-                        amount=salary.amount + update_amount,
-                        total_amount=salary.total_amount + update_amount,
-                    )
-
-            # update user balance to report profit
-            await user.update(balance=user.balance + report.profit())
-            if partner == settings.MISHA_PARTNER_ID:
-                await user.update(
-                    misha_balance=user.misha_balance + report.profit() * 0.5
-                )
-            # update charity balance
-            charity = await user.get_charity()
-            update_amount = report.amount * settings.CHARITY_FRACTION
-            await charity.update(
-                amount=charity.amount + update_amount,
-                total_amount=charity.total_amount + update_amount,
+                data.get("salary_percent", 0),
+                data.get("partner", 0),
+                data.get("erroneous", False),
             )
             await send_message(render_template("create_report/created.j2"))
         case confirm_form.reject:
@@ -143,12 +94,14 @@ async def handle_create_report_confirm(
 
 @dp.callback_query_handler(balance_form.callback_data().filter(), state="*")
 async def handle_balance_form(
-    query: types.CallbackQuery, callback_data: dict, state: FSMContext
+    query: types.CallbackQuery,
+    callback_data: dict,
+    state: FSMContext,
+    user: User,
+    currency: Currency,
 ):
     option_id = callback_data.get("id")
 
-    user = await User.get(id=query.from_user.id)
-    currency = await user.get_currency()
     match option_id:
         case balance_form.balance:
             await send_message(
@@ -11,8 +11,7 @@ from src.utils.send import send_message, send_message_to_admins
 
 
 @dp.message_handler(commands=["start"], state="*")
-async def start_command(message: types.Message, state: FSMContext):
-    user = await User.get(id=message.from_user.id)
+async def start_command(message: types.Message, state: FSMContext, user: User | None):
     if user is None:
         return
 
@@ -36,8 +35,9 @@ async def balance_command(message: types.Message, state: FSMContext):
 
 
 @dp.message_handler(commands=["register"], state="*")
-async def register_command(message: types.Message, state: FSMContext):
-    user = await User.get(id=message.from_user.id)
+async def register_command(
+    message: types.Message, state: FSMContext, user: User | None
+):
     if user is None:
         await send_message_to_admins(
             render_template(
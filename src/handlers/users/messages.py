@@ -4,13 +4,17 @@ from aiogram.dispatcher import FSMContext
 from src.states import States
 from src.loader import dp
 from src.data import settings
-from src.utils.send import send_message, send_message_to_admins, send_confirm_report
+from src.utils.send import (
+    send_message,
+    send_reports,
+    send_message_to_admins,
+    send_confirm_report,
+)
 from src.utils.parse import parse_date_interval
 from src.utils.validate import is_float
 from src.services.templates import render_template
 from src.services.database.api import (
-    get_user_reports_by_interval,
-    get_partners,
+    iter_report_details_by_interval,
     create_operation,
 )
 from src.services.database.models import User, Partner, Currency
@@ -23,34 +27,24 @@ async def handle_user_reports_date(message: types.Message, state: FSMContext):
     if interval is None:
         await send_message(render_template("invalid_interval.j2"))
         return
-    reports = await get_user_reports_by_interval(
-        message.from_user.id, interval.start, interval.end
+    count = await send_reports(
+        iter_report_details_by_interval(
+            interval.start, interval.end, user=message.from_user.id
+        ),
+        "report.j2",
     )
-    user = await User.get(id=message.from_user.id)
-    currency = await user.get_currency()
-
-    if len(reports) == 0:
+    if count == 0:
         await send_message(render_template("no_reports.j2"))
-
-    for report in reports:
-        partner = await report.get_partner()
-        await send_message(
-            render_template(
-                "report.j2",
-                context={"report": report, "partner": partner, "currency": currency},
-            ),
-            photo=report.photo,
-        )
     await state.reset_state(with_data=True)
 
 
 @dp.message_handler(
     state=States.CreateReport.photo, content_types=[types.ContentType.PHOTO]
 )
-async def handle_create_report_photo(message: types.Message, state: FSMContext):
+async def handle_create_report_photo(
+    message: types.Message, state: FSMContext, currency: Currency
+):
     photo = message.photo[0].file_id
-    user = await User.get(id=message.from_user.id)
-    currency = await user.get_currency()
     await send_message(
         render_template("create_report/amount.j2", context={"currency": currency})
     )
@@ -82,10 +76,9 @@ async def handle_create_report_refund_amount(message: types.Message, state: FSMC
         await send_message(render_template("invalid_integer.j2"))
         return
 
-    partners = await get_partners()
     await send_message(
         render_template("create_report/partner.j2"),
-        reply_markup=get_select_partner_keyboard(partners),
+        reply_markup=await get_select_partner_keyboard(),
     )
     await state.update_data(refund_amount=float(message.text))
     await state.set_state(States.CreateReport.partner)
@@ -133,19 +126,18 @@ async def handle_create_operation_amount(message: types.Message, state: FSMConte
 
 
 @dp.message_handler(state=States.CreateOperation.reason)
-async def handle_create_operation_reason(message: types.Message, state: FSMContext):
+async def handle_create_operation_reason(
+    message: types.Message, state: FSMContext, user: User, currency: Currency
+):
     data = await state.get_data()
     amount = data.get("amount", 0)
 
-    user = await User.get(id=message.from_user.id)
-    currency = await user.get_currency()
-
     # create operation
     operation = await create_operation(
         message.from_user.id, currency.convert_to_eur(amount), message.text
     )
     # update user balance
-    await user.update(balance=user.balance + currency.convert_to_eur(amount))
+    await user.increment(balance=currency.convert_to_eur(amount))
     # notify admins
     await send_message_to_admins(
         render_template(
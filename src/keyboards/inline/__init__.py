@@ -1,21 +1,34 @@
-from typing import Sequence
+from typing import Optional, Sequence
 
 from aiogram import types
 
+from src.data import settings
 from src.loader import bot
-from src.services.database.models import Partner, User, Currency
-from .callbacks import select_partner, select_user, select_currency
+from src.services.database import cache
+from src.services.database.api import (
+    get_partners,
+    get_users_page,
+)
+from src.services.database.models import Partner, User, Currency, Report
+from .callbacks import (
+    select_partner,
+    select_user,
+    users_page,
+    select_currency,
+    delete_album_report,
+)
 
 
-def get_select_partner_keyboard(
-        partners: Sequence[Partner], all_partner_button: bool = False
+@cache.versioned(Partner)
+async def get_select_partner_keyboard(
+        all_partner_button: bool = False,
 ) -> types.InlineKeyboardMarkup:
     keyboard = types.InlineKeyboardMarkup()
     if all_partner_button:
         keyboard.add(
             types.InlineKeyboardButton("Все", callback_data=select_partner.new(id=-1))
         )
-    for p in partners:
+    for p in await get_partners():
         keyboard.add(
             types.InlineKeyboardButton(
                 p.name, callback_data=select_partner.new(id=p.id)
@@ -24,9 +37,23 @@ def get_select_partner_keyboard(
     return keyboard
 
 
+@cache.versioned(User)
 async def get_select_users_keyboard(
-        users: Sequence[User],
+        is_admin: Optional[bool] = None,
+        after: Optional[int] = None,
+        before: Optional[int] = None,
 ) -> types.InlineKeyboardMarkup:
+    """
+    Page of users with prev and next buttons and button searching by username
+    :param is_admin: list only admins if True, only not admins if False
+    :param after: id of last user of previous page
+    :param before: id of first user of next page
+    """
+
+    users, has_more = await get_users_page(
+        settings.USERS_PAGE_SIZE, after=after, before=before, is_admin=is_admin
+    )
+
     keyboard = types.InlineKeyboardMarkup()
     for u in users:
         keyboard.add(
@@ -34,9 +61,49 @@ async def get_select_users_keyboard(
                 u.username, callback_data=select_user.new(id=u.id)
             )
         )
+
+    # page was opened from the other side, so there are users behind it
+    has_prev = after is not None or (before is not None and has_more)
+    has_next = before is not None or has_more
+    is_admin_arg = "" if is_admin is None else int(is_admin)
+    navigation = []
+    if has_prev and users:
+        navigation.append(
+            types.InlineKeyboardButton(
+                "◀️",
+                callback_data=users_page.new(
+                    is_admin=is_admin_arg, direction="prev", id=users[0].id
+                ),
+            )
+        )
+    if has_next and users:
+        navigation.append(
+            types.InlineKeyboardButton(
+                "▶️",
+                callback_data=users_page.new(
+                    is_admin=is_admin_arg, direction="next", id=users[-1].id
+                ),
+            )
+        )
+    if navigation:
+        keyboard.row(*navigation)
+    keyboard.add(
+        types.InlineKeyboardButton("🔍 Поиск", switch_inline_query_current_chat="")
+    )
     return keyboard
 
 
+def get_user_keyboard(user: User) -> types.InlineKeyboardMarkup:
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(
+        types.InlineKeyboardButton(
+            user.username, callback_data=select_user.new(id=user.id)
+        )
+    )
+    return keyboard
+
+
+@cache.versioned(Currency)
 async def get_select_currency_keyboard() -> types.InlineKeyboardMarkup:
     keyboard = types.InlineKeyboardMarkup()
     for c in await Currency.all():
@@ -46,3 +113,19 @@ async def get_select_currency_keyboard() -> types.InlineKeyboardMarkup:
             )
         )
     return keyboard
+
+
+def get_album_index_keyboard(
+        reports: Sequence[Report], row_width: int = 5
+) -> types.InlineKeyboardMarkup:
+    keyboard = types.InlineKeyboardMarkup(row_width=row_width)
+    keyboard.add(
+        *(
+            types.InlineKeyboardButton(
+                f"🗑 {number}",
+                callback_data=delete_album_report.new(report_id=r.id),
+            )
+            for number, r in enumerate(reports, start=1)
+        )
+    )
+    return keyboard
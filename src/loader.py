@@ -1,20 +1,37 @@
 from aiogram import Bot
 from aiogram import Dispatcher
 from aiogram import types
-from aiogram.contrib.fsm_storage.files import JSONStorage
 
 from src.data import settings
 from src.logger import init_logger
+from src.middlewares.database import DatabaseSessionMiddleware
+from src.middlewares.fsm import BufferedFSMMiddleware
 from src.middlewares.is_active import IsActiveMiddleware
+from src.middlewares.throttling import ThrottlingMiddleware
+from src.middlewares.user_context import UserContextMiddleware
+from src.services.database.storage import JSONRecordStorage, PostgresStorage
+from src.utils import updates
 from src.utils.filters.is_admin import IsAdmin
 
 init_logger()
 
 bot = Bot(token=settings.BOT_TOKEN, parse_mode=types.ParseMode.HTML)
-dp = Dispatcher(bot, storage=JSONStorage("states.json"))
+if settings.FSM_STORAGE == "postgres":
+    storage = PostgresStorage(ttl=settings.FSM_STATE_TTL)
+elif settings.PROCESSES > 1:
+    raise ValueError("Several processes share state only with postgres FSM storage")
+else:
+    storage = JSONRecordStorage("states.json")
+dp = Dispatcher(bot, storage=storage)
+if settings.UPDATE_WORKERS > settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW:
+    raise ValueError("UPDATE_WORKERS exceeds DB_POOL_SIZE + DB_MAX_OVERFLOW")
+if settings.UPDATE_WORKERS > 0:
+    updates.install(dp, settings.UPDATE_WORKERS)
 
-# Setup throttling middleware
-# dp.middleware.setup(ThrottlingMiddleware())
+dp.middleware.setup(ThrottlingMiddleware())
+dp.middleware.setup(DatabaseSessionMiddleware())
+dp.middleware.setup(BufferedFSMMiddleware())
+dp.middleware.setup(UserContextMiddleware())
 dp.middleware.setup(IsActiveMiddleware())
 
 # Setup admin filter
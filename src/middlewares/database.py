@@ -0,0 +1,30 @@
+import sys
+from contextlib import AsyncExitStack
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from src.services.database.tools import update_transaction
+
+
+class DatabaseSessionMiddleware(BaseMiddleware):
+    """
+    Open one database session per update and commit it once the update is handled,
+    writes are also committed before every outbound message, see commit_update
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        stack = AsyncExitStack()
+        await stack.enter_async_context(update_transaction())
+        data["database_scope"] = stack
+
+    async def on_post_process_update(
+        self, update: types.Update, results: list, data: dict
+    ):
+        stack = data.pop("database_scope", None)
+        if stack is not None:
+            # post process runs in a finally block, so exc_info holds handler error
+            await stack.__aexit__(*sys.exc_info())
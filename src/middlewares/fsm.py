@@ -0,0 +1,160 @@
+import copy
+import sys
+from typing import Optional
+
+from aiogram import Dispatcher, types
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.filters.builtin import StateFilter
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.dispatcher.storage import BaseStorage
+
+
+class BufferedFSMContext(FSMContext):
+    """
+    FSM context which reads record once and keeps changes in memory until flush,
+    storages with get_record and set_record are read and written by one query
+    """
+
+    def __init__(self, storage: BaseStorage, chat: int | None, user: int | None):
+        super().__init__(storage, chat, user)
+        self._state: Optional[str] = None
+        self._data: Optional[dict] = None
+        self._changed: set[str] = set()
+
+    async def load(self) -> Optional[str]:
+        """
+        Read record from storage
+        :return: current state
+        """
+
+        if hasattr(self.storage, "get_record"):
+            record = await self.storage.get_record(chat=self.chat, user=self.user)
+            self._state, self._data = record.state, record.data
+        else:
+            self._state = await self.storage.get_state(chat=self.chat, user=self.user)
+        return self._state
+
+    async def flush(self) -> None:
+        """Write changed state and data to storage"""
+
+        if not self._changed:
+            return
+
+        values = {}
+        if "state" in self._changed:
+            values["state"] = self._state
+        if "data" in self._changed:
+            values["data"] = self._data
+        self._changed.clear()
+
+        if hasattr(self.storage, "set_record"):
+            await self.storage.set_record(chat=self.chat, user=self.user, **values)
+            return
+        if "state" in values:
+            await self.storage.set_state(
+                chat=self.chat, user=self.user, state=values["state"]
+            )
+        if "data" in values:
+            await self.storage.set_data(
+                chat=self.chat, user=self.user, data=values["data"]
+            )
+
+    async def _get_data(self) -> dict:
+        if self._data is None:
+            self._data = await self.storage.get_data(chat=self.chat, user=self.user)
+        return self._data
+
+    async def get_state(self, default: Optional[str] = None) -> Optional[str]:
+        if self._state is None:
+            return self.storage.resolve_state(default)
+        return self._state
+
+    async def get_data(self, default: Optional[dict] = None) -> dict:
+        data = await self._get_data()
+        if not data and default is not None:
+            return default
+        return copy.deepcopy(data)
+
+    async def update_data(self, data: Optional[dict] = None, **kwargs):
+        (await self._get_data()).update(data or {}, **kwargs)
+        self._changed.add("data")
+
+    async def set_state(self, state=None):
+        self._state = self.storage.resolve_state(state)
+        self._changed.add("state")
+
+    async def set_data(self, data: Optional[dict] = None):
+        self._data = copy.deepcopy(data or {})
+        self._changed.add("data")
+
+    async def reset_state(self, with_data: Optional[bool] = True):
+        await self.set_state(None)
+        if with_data:
+            await self.set_data({})
+
+    async def reset_data(self):
+        await self.set_data({})
+
+    async def finish(self):
+        await self.reset_state(with_data=True)
+
+
+class BufferedFSMMiddleware(BaseMiddleware):
+    """
+    Replace handler FSM context with buffered one, so storage gets at most one read
+    and one write per message or callback query
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        await self._load(message, data)
+
+    async def on_pre_process_callback_query(
+        self, query: types.CallbackQuery, data: dict
+    ):
+        await self._load(query, data)
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        self._install(data)
+
+    async def on_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        self._install(data)
+
+    async def on_post_process_message(
+        self, message: types.Message, results: list, data: dict
+    ):
+        await self._flush(data)
+
+    async def on_post_process_callback_query(
+        self, query: types.CallbackQuery, results: list, data: dict
+    ):
+        await self._flush(data)
+
+    @staticmethod
+    async def _load(obj: types.Message | types.CallbackQuery, data: dict):
+        if isinstance(obj, types.CallbackQuery):
+            chat = obj.message.chat.id if obj.message else None
+        else:
+            chat = obj.chat.id
+        user = obj.from_user.id if obj.from_user else None
+        if chat is None and user is None:
+            return
+
+        context = BufferedFSMContext(Dispatcher.get_current().storage, chat, user)
+        # state filters take loaded state instead of reading storage again
+        StateFilter.ctx_state.set(await context.load())
+        data["buffered_state"] = context
+
+    @staticmethod
+    def _install(data: dict):
+        if "state" in data and "buffered_state" in data:
+            data["state"] = data["buffered_state"]
+
+    @staticmethod
+    async def _flush(data: dict):
+        context = data.pop("buffered_state", None)
+        # post process runs in a finally block, changes of failed handler are dropped
+        if context is not None and sys.exc_info()[0] is None:
+            await context.flush()
@@ -1,3 +1,5 @@
+import contextlib
+
 from aiogram import Dispatcher
 from aiogram import types
 from aiogram.dispatcher import DEFAULT_RATE_LIMIT
@@ -18,12 +20,27 @@ class ThrottlingMiddleware(BaseMiddleware):
         dispatcher = Dispatcher.get_current()
         if handler:
             limit = getattr(handler, "throttling_rate_limit", self.rate_limit)
-            key = getattr(handler, "throttling_key", f"{self.prefix}_{handler.__name__}")
+            key = getattr(
+                handler, "throttling_key", f"{self.prefix}_{handler.__name__}"
+            )
         else:
             limit = self.rate_limit
             key = f"{self.prefix}_message"
+        # storage shared by processes locks bucket, so concurrent updates can't
+        # both read it before it is written
+        lock = getattr(dispatcher.storage, "lock", None)
+        if lock is not None:
+            scope = lock(chat=message.chat.id, user=message.from_user.id)
+        else:
+            scope = contextlib.nullcontext()
         try:
-            await dispatcher.throttle(key, rate=limit)
+            async with scope:
+                await dispatcher.throttle(
+                    key,
+                    rate=limit,
+                    chat_id=message.chat.id,
+                    user_id=message.from_user.id,
+                )
         except Throttled as t:
             await self.message_throttled(message, t)
             raise CancelHandler()
@@ -0,0 +1,33 @@
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from src.services.database.models import User
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Resolve calling user, their currency, admin and active flags once per update
+    and pass them to filters and handlers as user, currency, is_admin and is_active
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        await self._resolve(message.from_user, data)
+
+    async def on_pre_process_callback_query(
+        self, query: types.CallbackQuery, data: dict
+    ):
+        await self._resolve(query.from_user, data)
+
+    async def on_pre_process_inline_query(self, query: types.InlineQuery, data: dict):
+        await self._resolve(query.from_user, data)
+
+    @staticmethod
+    async def _resolve(from_user: types.User | None, data: dict):
+        user = await User.get(id=from_user.id) if from_user else None
+        data["user"] = user
+        data["currency"] = await user.get_currency() if user else None
+        data["is_admin"] = bool(user and user.is_admin)
+        data["is_active"] = bool(user and user.active)
@@ -1,61 +1,84 @@
 import datetime
+from dataclasses import dataclass
+
+import sqlalchemy as sa
 
 from src.data import settings
-from src.services.database.api import (
-    get_users,
-    get_salaries,
-    get_charities,
-    get_bet20_salaries,
-    get_user_reports_by_partner_and_interval,
-    get_user_reports_by_partner,
-)
+from src.services.database.api import get_user_partner_statistic
+from src.services.database.models import User, Salary, Bet20Salary, Charity
+from src.services.database.tools import session_scope
 
 
 async def total_bet20_profit_from(user: int, from_: datetime.datetime | None) -> float:
-    if from_ is not None:
-        reports = await get_user_reports_by_partner_and_interval(
-            user, settings.BET_20_PARTNER_ID, from_, datetime.datetime.now()
-        )
-    else:
-        reports = await get_user_reports_by_partner(user, settings.BET_20_PARTNER_ID)
-    return round(sum([r.profit() for r in reports]), 2)
+    statistic = await get_user_partner_statistic(
+        user, settings.BET_20_PARTNER_ID, from_
+    )
+    return round(statistic.profit, 2)
 
 
 async def total_bet20_amount_from(user: int, from_: datetime.datetime | None) -> float:
-    if from_ is not None:
-        reports = await get_user_reports_by_partner_and_interval(
-            user, settings.BET_20_PARTNER_ID, from_, datetime.datetime.now()
+    statistic = await get_user_partner_statistic(
+        user, settings.BET_20_PARTNER_ID, from_
+    )
+    return round(statistic.turnover, 2)
+
+
+@dataclass(frozen=True)
+class BalancesSnapshot:
+    balance: float
+    misha_balance: float
+    salary: float
+    bet20_salary: float
+    charity: float
+    total_charity: float
+
+
+async def balances_snapshot() -> BalancesSnapshot:
+    """Sum balances of active users, their salaries and all charity in one query"""
+
+    active = User.active == True
+    q = (
+        sa.select(
+            _sum(sa.func.sum(User.balance).filter(active)),
+            _sum(sa.func.sum(User.misha_balance).filter(active)),
+            _sum(sa.func.sum(Salary.amount).filter(active)),
+            _sum(sa.func.sum(Bet20Salary.amount).filter(active)),
+            _sum(sa.func.sum(Charity.amount)),
+            _sum(sa.func.sum(Charity.total_amount)),
         )
-    else:
-        reports = await get_user_reports_by_partner(user, settings.BET_20_PARTNER_ID)
-    return round(sum([r.amount for r in reports]), 2)
+        .select_from(User)
+        .outerjoin(Salary, Salary.user == User.id)
+        .outerjoin(Bet20Salary, Bet20Salary.user == User.id)
+        .outerjoin(Charity, Charity.user == User.id)
+    )
+    async with session_scope() as session:
+        result = await session.execute(q)
+    return BalancesSnapshot(*(round(value, 2) for value in result.one()))
 
 
 async def get_common_balance() -> float:
-    users = await get_users()
-    return round(sum([u.balance for u in users]), 2)
+    return (await balances_snapshot()).balance
 
 
 async def get_common_misha_balance() -> float:
-    users = await get_users()
-    return round(sum([u.misha_balance for u in users]), 2)
+    return (await balances_snapshot()).misha_balance
 
 
 async def get_common_salary() -> float:
-    salaries = await get_salaries()
-    return round(sum([s.amount for s in salaries]), 2)
+    return (await balances_snapshot()).salary
 
 
 async def get_common_bet20_salary() -> float:
-    salaries = await get_bet20_salaries()
-    return round(sum([s.amount for s in salaries]), 2)
+    return (await balances_snapshot()).bet20_salary
 
 
 async def get_common_total_charity() -> float:
-    charity = await get_charities()
-    return round(sum([c.total_amount for c in charity]), 2)
+    return (await balances_snapshot()).total_charity
 
 
 async def get_common_charity() -> float:
-    charity = await get_charities()
-    return round(sum([c.amount for c in charity]), 2)
+    return (await balances_snapshot()).charity
+
+
+def _sum(column_sum):
+    return sa.func.coalesce(column_sum, 0)
@@ -1,13 +1,50 @@
+from dataclasses import astuple
+from dataclasses import dataclass
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
 from typing import Sequence
 
 from sqlalchemy import and_
+from sqlalchemy.dialects import postgresql
 
+from . import cache
 from .models import *
 from .tools import session_scope
+from .tools import transaction
 
+_ROLLUP_TOTALS = ("count", "turnover", "profit", "refunds", "erroneous_count")
 
-async def create_user(user_id: int, username: str) -> None:
-    await User.create(
+
+@dataclass(frozen=True)
+class ReportDetails:
+    """Report loaded together with the rows its templates render"""
+
+    report: Report
+    user: User
+    partner: Partner
+    currency: Currency
+
+
+@dataclass(frozen=True)
+class OperationDetails:
+    operation: Operation
+    user: User
+
+
+@dataclass(frozen=True)
+class ReportsStatistic:
+    count: int
+    turnover: float
+    profit: float
+    refunds: float
+    erroneous_count: int
+
+
+async def create_user(user_id: int, username: str) -> User:
+    return await User.create(
         id=user_id, username=username, balance=0, misha_balance=0, currency=1
     )
 
@@ -24,6 +61,58 @@ async def create_charity(user: int) -> None:
     await Charity.create(user=user, amount=0, total_amount=0)
 
 
+async def increment_salary(user: int, amount: float) -> None:
+    await Salary.increment_where(
+        Salary.user == user, amount=amount, total_amount=amount
+    )
+
+
+async def increment_bet20_salary(user: int, amount: float) -> None:
+    await Bet20Salary.increment_where(
+        Bet20Salary.user == user, amount=amount, total_amount=amount
+    )
+
+
+async def increment_charity(user: int, amount: float) -> None:
+    await Charity.increment_where(
+        Charity.user == user, amount=amount, total_amount=amount
+    )
+
+
+async def reset_amounts(
+    model: type[Salary] | type[Bet20Salary] | type[Charity], *criteria
+) -> list[tuple[int, float]]:
+    """
+    Atomically set amounts of rows matching criteria to zero, rows are locked while
+    their amounts are read, so amount added concurrently is never lost
+    :param model: Salary, Bet20Salary or Charity
+    :param criteria: criteria selecting rows to reset
+    :return: user id and amount before reset of every reset row
+    """
+
+    old = (
+        sa.select(model.user, model.amount.label("old_amount"))
+        .filter(*criteria)
+        .with_for_update()
+        .subquery()
+    )
+    # core update, orm one can't return columns of other table
+    table = model.__table__
+    q = (
+        sa.update(table)
+        .where(table.c.user == old.c.user)
+        .values(amount=0, last_debiting_at=datetime.datetime.now())
+        .returning(table.c.user, old.c.old_amount)
+    )
+    async with session_scope() as session:
+        result = await session.execute(q)
+        reset = [(user, amount) for user, amount in result.all()]
+
+    for user, _ in reset:
+        cache.invalidate(session, model, (user,))
+    return reset
+
+
 async def get_users() -> Sequence[User]:
     return await User.filter(User.active == True)
 
@@ -46,30 +135,85 @@ async def get_bet20_salaries() -> Sequence[Bet20Salary]:
     return result.scalars().all()
 
 
-async def get_user_reports_by_interval(
-    user_id: int, start: datetime.datetime, end: datetime.datetime
-) -> Sequence[Report]:
-    return await Report.filter(
-        and_(
-            Report.user == user_id,
-            Report.created_at >= start,
-            Report.created_at <= end,
-            Report.active == True,
-        )
-    )
-
-
-async def get_partner_reports_by_interval(
-    partner_id: int, start: datetime.datetime, end: datetime.datetime
-) -> Sequence[Report]:
-    return await Report.filter(
-        and_(
-            Report.partner == partner_id,
-            Report.created_at >= start,
-            Report.created_at <= end,
-            Report.active == True,
-        )
+async def iter_report_details_by_interval(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    user: int | None = None,
+    partner: int | None = None,
+    batch: int = 200,
+) -> AsyncIterator[ReportDetails]:
+    """
+    Iterate active reports with their user, partner and currency ordered by date
+    :param start: interval start
+    :param end: interval end
+    :param user: only reports of this user if given
+    :param partner: only reports by this partner if given
+    :param batch: count of reports loaded by one query
+    """
+
+    criteria = [Report.created_at >= start, Report.created_at <= end]
+    if user is not None:
+        criteria.append(Report.user == user)
+    if partner is not None:
+        criteria.append(Report.partner == partner)
+
+    async for details in _iter_keyset(
+        lambda after: _get_report_details_page(criteria, after, batch),
+        lambda details: (details.report.created_at, details.report.id),
+        batch,
+    ):
+        yield details
+
+
+async def get_report_details(report_id: int) -> ReportDetails | None:
+    """Get active report with its user, partner and currency"""
+
+    page = await _get_report_details_page([Report.id == report_id], None, 1)
+    return page[0] if page else None
+
+
+async def _get_report_details_page(
+    criteria: list, after: tuple | None, batch: int
+) -> Sequence[ReportDetails]:
+    if after is not None:
+        criteria = [*criteria, sa.tuple_(Report.created_at, Report.id) > after]
+    q = (
+        sa.select(Report, User, Partner, Currency)
+        .join(User, Report.user == User.id)
+        .join(Partner, Report.partner == Partner.id)
+        .join(Currency, User.currency == Currency.id)
+        .filter(Report.active == True, *criteria)
+        .order_by(Report.created_at, Report.id)
+        .limit(batch)
     )
+    async with session_scope() as session:
+        result = await session.execute(q)
+    return [ReportDetails(*row) for row in result.all()]
+
+
+async def _iter_keyset(
+    get_page: Callable[[tuple | None], Awaitable[Sequence]],
+    key: Callable[[Any], tuple],
+    batch: int,
+) -> AsyncIterator:
+    """
+    Iterate rows page by page, pages are read one by one in the current session,
+    so listing never takes a second connection. Sends between pages commit
+    update transaction, so connection is held only while page is read
+    :param get_page: coroutine function returning page of rows after key or first one
+    :param key: function returning keyset of row
+    :param batch: page size
+    """
+
+    after = None
+    while True:
+        rows = await get_page(after)
+        for row in rows:
+            yield row
+
+        if len(rows) < batch:
+            return
+        after = key(rows[-1])
 
 
 async def get_user_reports(user: int) -> Sequence[Report]:
@@ -104,63 +248,129 @@ async def create_operation(user: int, amount: int | float, reason: str) -> Opera
     return await Operation.create(user=user, amount=amount, reason=reason)
 
 
-async def get_operations_by_interval(
-    start: datetime.datetime, end: datetime.datetime
-) -> Sequence[Operation]:
-    return await Operation.filter(
-        and_(Operation.created_at >= start, Operation.created_at <= end)
+async def iter_operation_details_by_interval(
+    start: datetime.datetime, end: datetime.datetime, batch: int = 200
+) -> AsyncIterator[OperationDetails]:
+    criteria = [Operation.created_at >= start, Operation.created_at <= end]
+    async for details in _iter_keyset(
+        lambda after: _get_operation_details_page(criteria, after, batch),
+        lambda details: (details.operation.created_at, details.operation.id),
+        batch,
+    ):
+        yield details
+
+
+async def _get_operation_details_page(
+    criteria: list, after: tuple | None, batch: int
+) -> Sequence[OperationDetails]:
+    if after is not None:
+        criteria = [*criteria, sa.tuple_(Operation.created_at, Operation.id) > after]
+    q = (
+        sa.select(Operation, User)
+        .join(User, Operation.user == User.id)
+        .filter(*criteria)
+        .order_by(Operation.created_at, Operation.id)
+        .limit(batch)
     )
-
-
-async def get_not_admin_users() -> Sequence[User]:
-    return await User.filter(and_(User.is_admin == False, User.active == True))
+    async with session_scope() as session:
+        result = await session.execute(q)
+    return [OperationDetails(*row) for row in result.all()]
 
 
 async def get_admin_users() -> Sequence[User]:
     return await User.filter(and_(User.is_admin == True, User.active == True))
 
 
-async def create_partner(name: str) -> None:
-    await Partner.create(name=name)
-
+async def get_users_page(
+    limit: int,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    is_admin: Optional[bool] = None,
+) -> tuple[Sequence[User], bool]:
+    """
+    Get page of active users ordered by id
+    :param limit: users in page
+    :param after: id of last user of previous page
+    :param before: id of first user of next page
+    :param is_admin: only admins if True, only not admins if False
+    :return: users and whether there are more users in requested direction
+    """
+
+    q = sa.select(User).filter(User.active == True)
+    if is_admin is not None:
+        q = q.filter(User.is_admin == is_admin)
+    if before is not None:
+        q = q.filter(User.id < before).order_by(User.id.desc())
+    else:
+        if after is not None:
+            q = q.filter(User.id > after)
+        q = q.order_by(User.id)
 
-async def get_reports_by_interval(
-    start: datetime.datetime, end: datetime.datetime
-) -> Sequence[Report]:
-    return await Report.filter(
-        and_(
-            Report.created_at >= start, Report.created_at <= end, Report.active == True
-        )
+    async with session_scope() as session:
+        result = await session.execute(q.limit(limit + 1))
+    users = result.scalars().all()
+    has_more = len(users) > limit
+    users = users[:limit]
+    if before is not None:
+        users.reverse()
+    return users, has_more
+
+
+async def search_users(
+    prefix: str, limit: int, is_admin: Optional[bool] = None
+) -> Sequence[User]:
+    """
+    Get active users with username starting with prefix, case insensitive
+    :param is_admin: only admins if True, only not admins if False
+    """
+
+    escaped = prefix.lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+    q = sa.select(User).filter(
+        User.active == True,
+        # pattern is built here, so prefix index can be used
+        sa.func.lower(User.username).like(escaped + "%", escape="/"),
     )
+    if is_admin is not None:
+        q = q.filter(User.is_admin == is_admin)
+    q = q.order_by(sa.func.lower(User.username)).limit(limit)
+    async with session_scope() as session:
+        result = await session.execute(q)
+    return result.scalars().all()
 
 
-async def get_user_reports_by_partner_and_interval(
-    user: int, partner: int, start: datetime.datetime, end: datetime.datetime
-) -> Sequence[Report]:
-    return await Report.filter(
-        and_(
-            Report.user == user,
-            Report.partner == partner,
-            Report.created_at >= start,
-            Report.created_at <= end,
-            Report.active == True,
+async def get_active_user_ids() -> Sequence[int]:
+    async with session_scope() as session:
+        result = await session.execute(
+            sa.select(User.id).filter(User.active == True).order_by(User.id)
         )
-    )
+    return result.scalars().all()
 
 
-async def get_user_reports_by_partner(user: int, partner: int) -> Sequence[Report]:
-    return await Report.filter(
-        and_(Report.user == user, Report.partner == partner, Report.active == True)
-    )
+async def deactivate_users(users: Sequence[int]) -> None:
+    async with session_scope() as session:
+        await session.execute(
+            sa.update(User).where(User.id.in_(users)).values(active=False)
+        )
+        for user in users:
+            cache.invalidate(session, User, (user,))
 
 
-async def deactive_report(report_id: int) -> None:
-    report = await Report.get(id=report_id)
-    await report.update(active=False)
+async def create_partner(name: str) -> None:
+    await Partner.create(name=name)
 
 
-async def get_charities() -> Sequence[Charity]:
-    return await Charity.all()
+async def deactive_report(report_id: int) -> Report | None:
+    """Deactivate report, return None if it is already inactive"""
+
+    async with session_scope() as session:
+        q = (
+            sa.update(Report)
+            .where(Report.id == report_id, Report.active == True)
+            .values(active=False)
+            .returning(Report)
+        )
+        result = await session.execute(q)
+    return result.scalars().first()
 
 
 async def update_user_work_staus(user: int, status: bool) -> None:
@@ -179,3 +389,149 @@ async def get_last_work_interval(user: int) -> WorkInterval:
 async def end_last_work_interval(user: int) -> None:
     last_work_interval = await get_last_work_interval(user)
     await last_work_interval.update(end_at=datetime.datetime.now())
+
+
+async def update_report_rollup(report: Report, sign: int = 1) -> None:
+    """
+    Add report to its daily rollup row or take it back
+    :param report: created or deactivated report
+    :param sign: 1 to add report, -1 to take it back
+    """
+
+    q = postgresql.insert(ReportDailyRollup).values(
+        day=report.created_at.date(),
+        user=report.user,
+        partner=report.partner,
+        count=sign,
+        turnover=sign * report.amount,
+        profit=sign * report.profit(),
+        refunds=sign * report.refund_amount,
+        erroneous_count=sign * int(report.erroneous),
+    )
+    q = q.on_conflict_do_update(
+        index_elements=[
+            ReportDailyRollup.day,
+            ReportDailyRollup.user,
+            ReportDailyRollup.partner,
+        ],
+        set_={
+            c: getattr(ReportDailyRollup, c) + getattr(q.excluded, c)
+            for c in _ROLLUP_TOTALS
+        },
+    )
+    async with session_scope() as session:
+        await session.execute(q)
+
+
+async def rebuild_report_rollup() -> None:
+    """Recalculate daily rollup from all active reports"""
+
+    day = sa.cast(Report.created_at, sa.Date)
+    q = sa.select(
+        day,
+        Report.user,
+        Report.partner,
+        sa.func.count(),
+        sa.func.sum(Report.amount),
+        sa.func.sum(Report.refund_amount - Report.amount),
+        sa.func.sum(Report.refund_amount),
+        sa.func.count().filter(Report.erroneous == True),
+    ).filter(Report.active == True)
+    q = q.group_by(day, Report.user, Report.partner)
+    async with transaction() as session:
+        await session.execute(sa.delete(ReportDailyRollup))
+        await session.execute(
+            sa.insert(ReportDailyRollup).from_select(
+                ["day", "user", "partner", *_ROLLUP_TOTALS], q
+            )
+        )
+
+
+async def get_reports_statistic(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    user: int | None = None,
+    partner: int | None = None,
+) -> ReportsStatistic:
+    """Sum daily rollup of reports created from start day to end day inclusive"""
+
+    criteria = [
+        ReportDailyRollup.day >= start.date(),
+        ReportDailyRollup.day <= end.date(),
+    ]
+    if user is not None:
+        criteria.append(ReportDailyRollup.user == user)
+    if partner is not None:
+        criteria.append(ReportDailyRollup.partner == partner)
+    return await _get_rollup_statistic(*criteria)
+
+
+async def get_user_partner_statistic(
+    user: int, partner: int, from_: datetime.datetime | None
+) -> ReportsStatistic:
+    """Sum user reports by partner created since from_ or all of them if it is None"""
+
+    if from_ is None:
+        return await _get_rollup_statistic(
+            ReportDailyRollup.user == user, ReportDailyRollup.partner == partner
+        )
+
+    # rollup keeps whole days, so the day of from_ is summed from reports
+    next_day = datetime.datetime.combine(
+        from_.date() + datetime.timedelta(days=1), datetime.time()
+    )
+    q = sa.select(
+        sa.func.count(),
+        _coalesce_sum(Report.amount),
+        _coalesce_sum(Report.refund_amount - Report.amount),
+        _coalesce_sum(Report.refund_amount),
+        sa.func.count().filter(Report.erroneous == True),
+    ).filter(
+        Report.user == user,
+        Report.partner == partner,
+        Report.created_at >= from_,
+        Report.created_at < next_day,
+        Report.active == True,
+    )
+    async with session_scope() as session:
+        result = await session.execute(q)
+    first_day = ReportsStatistic(*result.one())
+    rest = await _get_rollup_statistic(
+        ReportDailyRollup.user == user,
+        ReportDailyRollup.partner == partner,
+        ReportDailyRollup.day >= next_day.date(),
+    )
+    return ReportsStatistic(*(a + b for a, b in zip(astuple(first_day), astuple(rest))))
+
+
+async def _get_rollup_statistic(*criteria) -> ReportsStatistic:
+    q = sa.select(
+        *(_coalesce_sum(getattr(ReportDailyRollup, c)) for c in _ROLLUP_TOTALS)
+    ).filter(*criteria)
+    async with session_scope() as session:
+        result = await session.execute(q)
+    return ReportsStatistic(*result.one())
+
+
+def _coalesce_sum(column):
+    return sa.func.coalesce(sa.func.sum(column), 0)
+
+
+async def warmup() -> None:
+    """Run hot queries once so their statements are prepared on the connection"""
+
+    now = datetime.datetime.now()
+    await User.get(id=0)
+    await Currency.get(id=0)
+    await Partner.get(id=0)
+    await get_users()
+    await get_partners()
+    await get_admin_users()
+    for criteria in (
+        [Report.user == 0],
+        [Report.partner == 0],
+        [],
+    ):
+        criteria = [Report.created_at >= now, Report.created_at <= now, *criteria]
+        await _get_report_details_page(criteria, None, 200)
+        await _get_report_details_page(criteria, (now, 0), 200)
@@ -0,0 +1,15 @@
+import asyncio
+
+from src.services.database.api import rebuild_report_rollup
+from src.services.database.config import engine
+
+
+async def main():
+    try:
+        await rebuild_report_rollup()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,16 @@
+from typing import Any
 from typing import Generator
+from typing import Optional
 from typing import Self
 from typing import Sequence
 
+from sqlalchemy import and_
 from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import make_transient_to_detached
 
+from src.services.database import cache
 from src.services.database.tools import session_scope
 
 
@@ -43,16 +48,32 @@ class Model(DeclarativeBase):
             instance = cls(**kwargs)
             session.add(instance)
 
+        cache.invalidate(session, cls, instance.primary_key)
         return instance
 
     @classmethod
     async def get(cls, **kwargs) -> Self:
+        key = cls._cache_key(kwargs)
+        model_cache = cache.get_cache(cls) if key is not None else None
+        if model_cache is not None and (values := model_cache.get(key)) is not None:
+            # every caller gets own instance, detached like a freshly loaded one
+            instance = cls(**values)
+            make_transient_to_detached(instance)
+            return instance
+
+        # write committed while row is read must not leave old row in cache
+        version = cache.get_version(cls)
         async with session_scope() as session:
             q = select(cls).filter_by(**kwargs)
             instances = await session.execute(q)
             instance = instances.first()
 
-        return instance if instance is None else instance[0]
+        if instance is None:
+            return None
+        instance = instance[0]
+        if model_cache is not None and cache.get_version(cls) == version:
+            model_cache.set(key, {k: getattr(instance, k) for k in instance.columns})
+        return instance
 
     @classmethod
     async def get_or_create(cls, **kwargs) -> tuple[Self, bool]:
@@ -65,24 +86,80 @@ class Model(DeclarativeBase):
     async def update(self, **new_values) -> Self:
         new_values = self._filter_new_values(new_values)
         async with session_scope() as session:
-            unset_values = {
-                k: getattr(self, k) for k in self.columns if k not in new_values
-            }
-            q = update(self.__class__).values(**new_values).filter_by(**unset_values)
+            # only primary key, other columns of this copy may be out of date
+            q = (
+                update(self.__class__)
+                .values(**new_values)
+                .where(*self._primary_key_criteria())
+            )
             await session.execute(q)
 
+        cache.invalidate(session, self.__class__, self.primary_key)
+
         for key, value in new_values.items():
             setattr(self, key, value)
 
         return self
 
+    @classmethod
+    async def increment_where(cls, where, **deltas) -> Sequence[Self]:
+        """
+        Atomically add deltas to columns of every row matching where
+        :param where: criterion selecting rows to update
+        :param deltas: column name to the value added to it
+        :return: updated rows
+        """
+
+        async with session_scope() as session:
+            values = {getattr(cls, k): getattr(cls, k) + v for k, v in deltas.items()}
+            q = update(cls).where(where).values(values).returning(cls)
+            instances = await session.execute(q)
+            instances = instances.scalars().fetchall()
+
+        for instance in instances:
+            cache.invalidate(session, cls, instance.primary_key)
+        return instances
+
+    async def increment(self, **deltas) -> Self:
+        """Atomically add deltas to columns of this row and refresh them"""
+
+        instances = await self.increment_where(
+            and_(*self._primary_key_criteria()), **deltas
+        )
+        for instance in instances:
+            for key in deltas:
+                setattr(self, key, getattr(instance, key))
+
+        return self
+
     async def delete(self) -> None:
         async with session_scope() as session:
             await session.delete(self)
 
+        cache.invalidate(session, self.__class__, self.primary_key)
+
     @property
     def columns(self) -> Generator[str, str, None]:
         return (c.key for c in self.__table__.columns)
 
+    @property
+    def primary_key(self) -> tuple:
+        return tuple(getattr(self, c.key) for c in self.__table__.primary_key.columns)
+
+    @classmethod
+    def _cache_key(cls, kwargs: dict[str, Any]) -> Optional[tuple]:
+        """Return cache key if row is looked up by exactly its integer primary key"""
+
+        columns = cls.__table__.primary_key.columns
+        if len(kwargs) != len(columns):
+            return None
+        key = tuple(kwargs.get(c.key) for c in columns)
+        if not all(isinstance(value, int) for value in key):
+            return None
+        return key
+
+    def _primary_key_criteria(self) -> list:
+        return [c == getattr(self, c.key) for c in self.__table__.primary_key.columns]
+
     def _filter_new_values(self, new_value: dict):
         return {k: v for k, v in new_value.items() if k in self.columns}
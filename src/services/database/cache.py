@@ -0,0 +1,147 @@
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.data import settings
+from src.utils import metrics
+
+_PENDING_INVALIDATIONS = "cache_invalidations"
+
+
+class TTLCache:
+    """Size bounded LRU cache with entries expiring after ttl seconds"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value) -> None:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def status(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_caches: dict[type, TTLCache] = {}
+# incremented on every write to model table, values built from table stay valid
+# while its version is the same
+_versions: dict[type, int] = {}
+
+
+def cached(model: type) -> type:
+    """Class decorator enabling cache of model rows looked up by primary key"""
+
+    cache = _caches[model] = TTLCache(settings.CACHE_TTL, settings.CACHE_SIZE)
+    metrics.register("cache {}".format(model.__tablename__), cache.status)
+    return model
+
+
+def get_cache(model: type) -> Optional[TTLCache]:
+    if settings.CACHE_TTL <= 0:
+        return None
+    return _caches.get(model)
+
+
+def invalidate(session: AsyncSession, model: type, key: Optional[tuple]) -> None:
+    """
+    Drop cached row and bump model version now and once more when session
+    transaction ends, so row read by concurrent update before commit doesn't stay
+    in cache
+    :param session: session changing the row
+    :param model: changed model
+    :param key: primary key of the row, None drops all rows of the model
+    """
+
+    _drop(model, key)
+    pending = session.sync_session.info.setdefault(_PENDING_INVALIDATIONS, set())
+    pending.add((model, key))
+
+
+def get_version(model: type) -> int:
+    return _versions.get(model, 0)
+
+
+def versioned(*models: type):
+    """
+    Decorator caching result of async function until one of models is written or
+    CACHE_TTL passes, function arguments are cache key and must be hashable.
+    Versions are bumped only by writes of this process, ttl bounds staleness after
+    writes made by others
+    :param models: models function result is built from
+    """
+
+    def decorator(func: Callable[..., Awaitable]):
+        results: dict[tuple, tuple[tuple, float, Any]] = {}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if settings.CACHE_TTL <= 0:
+                return await func(*args, **kwargs)
+
+            key = (args, tuple(sorted(kwargs.items())))
+            # versions are taken before reading, so write during read isn't missed
+            versions = tuple(get_version(model) for model in models)
+            now = time.monotonic()
+            entry = results.get(key)
+            if entry is not None and entry[0] == versions and entry[1] > now:
+                return entry[2]
+
+            result = await func(*args, **kwargs)
+            results[key] = (versions, now + settings.CACHE_TTL, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _drop(model: type, key: Optional[tuple]) -> None:
+    _versions[model] = get_version(model) + 1
+    if model not in _caches:
+        return
+    if key is None:
+        _caches[model].clear()
+    else:
+        _caches[model].pop(key)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_pending(session: Session, *args) -> None:
+    for model, key in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        _drop(model, key)
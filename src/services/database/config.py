@@ -4,9 +4,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from src.data.settings import POSTGRESQL_URI
+from src.data import settings
 
 _logger = logging.getLogger(__name__)
 
-engine = create_async_engine(POSTGRESQL_URI)
+engine = create_async_engine(
+    settings.POSTGRESQL_URI,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+)
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
@@ -1,11 +1,14 @@
 import datetime
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import mapped_column, Mapped
 
 from .base import Model
+from .cache import cached
 
 
+@cached
 class Currency(Model):
     __tablename__ = "currency"
 
@@ -21,6 +24,7 @@ class Currency(Model):
         return round(amount * self.exchange_rate, 2)
 
 
+@cached
 class User(Model):
     __tablename__ = "user"
 
@@ -61,8 +65,42 @@ class User(Model):
         return currency.convert_to_eur(self.misha_balance)
 
 
+# username prefix search
+sa.Index(
+    "ix_user_username_lower",
+    sa.func.lower(User.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+    postgresql_where=sa.text("active"),
+)
+
+
 class Report(Model):
     __tablename__ = "report"
+    __table_args__ = (
+        sa.Index(
+            "ix_report_user_created_at",
+            "user",
+            "created_at",
+            postgresql_where=sa.text("active"),
+        ),
+        sa.Index(
+            "ix_report_partner_created_at",
+            "partner",
+            "created_at",
+            postgresql_where=sa.text("active"),
+        ),
+        sa.Index(
+            "ix_report_user_partner_created_at",
+            "user",
+            "partner",
+            "created_at",
+            postgresql_include=["amount", "refund_amount", "erroneous"],
+            postgresql_where=sa.text("active"),
+        ),
+        sa.Index(
+            "ix_report_created_at", "created_at", postgresql_where=sa.text("active")
+        ),
+    )
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
     user: Mapped[int] = mapped_column(sa.BigInteger, sa.ForeignKey("user.id"))
@@ -87,6 +125,7 @@ class Report(Model):
         return self.refund_amount - self.amount
 
 
+@cached
 class Partner(Model):
     __tablename__ = "partner"
 
@@ -126,6 +165,7 @@ class Bet20Salary(Model):
 
 class Operation(Model):
     __tablename__ = "operation"
+    __table_args__ = (sa.Index("ix_operation_created_at", "created_at"),)
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
     user: Mapped[int] = mapped_column(sa.BigInteger, sa.ForeignKey("user.id"))
@@ -151,6 +191,13 @@ class Charity(Model):
 
 class WorkInterval(Model):
     __tablename__ = "work_interval"
+    __table_args__ = (
+        sa.Index(
+            "ix_work_interval_user_open",
+            "user",
+            postgresql_where=sa.text("end_at IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
     start_at: Mapped[datetime.datetime] = mapped_column(
@@ -162,3 +209,37 @@ class WorkInterval(Model):
     user: Mapped[int] = mapped_column(
         sa.BigInteger, sa.ForeignKey("user.id"), primary_key=True
     )
+
+
+class ReportDailyRollup(Model):
+    __tablename__ = "report_daily_rollup"
+    __table_args__ = (
+        sa.Index("ix_report_daily_rollup_user_partner_day", "user", "partner", "day"),
+    )
+
+    day: Mapped[datetime.date] = mapped_column(sa.Date, primary_key=True)
+    user: Mapped[int] = mapped_column(
+        sa.BigInteger, sa.ForeignKey("user.id"), primary_key=True
+    )
+    partner: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("partner.id"), primary_key=True
+    )
+    count: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    turnover: Mapped[float] = mapped_column(sa.Float, nullable=False, default=0)
+    profit: Mapped[float] = mapped_column(sa.Float, nullable=False, default=0)
+    refunds: Mapped[float] = mapped_column(sa.Float, nullable=False, default=0)
+    erroneous_count: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+
+
+class FSMState(Model):
+    __tablename__ = "fsm_state"
+    __table_args__ = (sa.Index("ix_fsm_state_updated_at", "updated_at"),)
+
+    chat: Mapped[int] = mapped_column(sa.BigInteger, primary_key=True)
+    user: Mapped[int] = mapped_column(sa.BigInteger, primary_key=True)
+    state: Mapped[str] = mapped_column(sa.String, nullable=True, default=None)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    bucket: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        sa.DateTime, nullable=False, default=datetime.datetime.now
+    )
@@ -0,0 +1,286 @@
+import asyncio
+import copy
+import datetime
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from aiogram.contrib.fsm_storage.files import JSONStorage
+from aiogram.dispatcher.storage import BaseStorage
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .models import FSMState
+from .tools import session_scope
+from .tools import transaction
+
+_logger = logging.getLogger(__name__)
+
+# values of columns in empty record
+_EMPTY = {
+    "state": sa.null(),
+    "data": sa.literal({}, JSONB),
+    "bucket": sa.literal({}, JSONB),
+}
+
+
+@dataclass(frozen=True)
+class FSMRecord:
+    state: Optional[str] = None
+    data: dict = field(default_factory=dict)
+    bucket: dict = field(default_factory=dict)
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM storage keeping one fsm_state row per chat and user. Every write is upsert of
+    changed columns only, rows not updated for ttl seconds are treated as empty
+    """
+
+    def __init__(self, ttl: int = 0):
+        """
+        :param ttl: seconds after last update when record expires, 0 disables expiry
+        """
+        self._ttl = ttl
+
+    async def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+    async def get_record(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+    ) -> FSMRecord:
+        """Read state, data and bucket by one query"""
+
+        chat, user = self.check_address(chat=chat, user=user)
+        q = sa.select(FSMState.state, FSMState.data, FSMState.bucket).where(
+            FSMState.chat == int(chat), FSMState.user == int(user)
+        )
+        if self._ttl:
+            q = q.where(FSMState.updated_at >= self._expired_before())
+        async with session_scope() as session:
+            row = (await session.execute(q)).first()
+        if row is None:
+            return FSMRecord()
+        return FSMRecord(row.state, row.data, row.bucket)
+
+    async def set_record(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        **values: Any,
+    ) -> None:
+        """
+        Write given columns by one query, other columns are kept
+        :param values: state, data or bucket
+        """
+
+        await self._upsert(chat, user, values, {})
+
+    async def get_state(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        default: Optional[str] = None,
+    ) -> Optional[str]:
+        record = await self.get_record(chat=chat, user=user)
+        if record.state is None:
+            return self.resolve_state(default)
+        return record.state
+
+    async def get_data(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        default: Optional[dict] = None,
+    ) -> dict:
+        record = await self.get_record(chat=chat, user=user)
+        if not record.data and default is not None:
+            return default
+        return record.data
+
+    async def set_state(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        state: Optional[str] = None,
+    ) -> None:
+        await self.set_record(chat=chat, user=user, state=self.resolve_state(state))
+
+    async def set_data(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        data: Optional[dict] = None,
+    ) -> None:
+        await self.set_record(chat=chat, user=user, data=data or {})
+
+    async def update_data(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        data: Optional[dict] = None,
+        **kwargs,
+    ) -> None:
+        await self._upsert(chat, user, {}, {"data": {**(data or {}), **kwargs}})
+
+    def has_bucket(self) -> bool:
+        return True
+
+    async def get_bucket(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        default: Optional[dict] = None,
+    ) -> dict:
+        record = await self.get_record(chat=chat, user=user)
+        if not record.bucket and default is not None:
+            return default
+        return record.bucket
+
+    async def set_bucket(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        bucket: Optional[dict] = None,
+    ) -> None:
+        await self.set_record(chat=chat, user=user, bucket=bucket or {})
+
+    async def update_bucket(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        bucket: Optional[dict] = None,
+        **kwargs,
+    ) -> None:
+        await self._upsert(chat, user, {}, {"bucket": {**(bucket or {}), **kwargs}})
+
+    @asynccontextmanager
+    async def lock(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+    ):
+        """
+        Hold advisory lock of record till the end of transaction, storage calls
+        inside the block run in it, so record read and write by other processes wait
+        """
+
+        chat, user = self.check_address(chat=chat, user=user)
+        key = sa.func.hashtextextended("{}:{}".format(chat, user), 0)
+        async with transaction() as session:
+            await session.execute(sa.select(sa.func.pg_advisory_xact_lock(key)))
+            yield
+
+    async def cleanup(self) -> int:
+        """
+        Delete expired records
+        :return: count of deleted records
+        """
+
+        if not self._ttl:
+            return 0
+        async with session_scope() as session:
+            result = await session.execute(
+                sa.delete(FSMState).where(
+                    FSMState.updated_at < self._expired_before()
+                )
+            )
+        return result.rowcount
+
+    async def cleanup_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                deleted = await self.cleanup()
+            except Exception as e:
+                _logger.error("FSM storage cleanup failed: {}".format(e))
+            else:
+                _logger.info("FSM storage cleanup: {} expired".format(deleted))
+
+    async def _upsert(
+        self,
+        chat: str | int | None,
+        user: str | int | None,
+        values: dict[str, Any],
+        merges: dict[str, dict],
+    ) -> None:
+        """
+        Insert or update record
+        :param values: columns replaced by given values
+        :param merges: json columns merged with given values
+        """
+
+        chat, user = self.check_address(chat=chat, user=user)
+        now = datetime.datetime.now()
+        q = postgresql.insert(FSMState).values(
+            chat=int(chat), user=int(user), updated_at=now, **values, **merges
+        )
+
+        set_ = {"updated_at": now}
+        for column, empty in _EMPTY.items():
+            current = getattr(FSMState, column)
+            if self._ttl:
+                expired = FSMState.updated_at < self._expired_before()
+                current = sa.case((expired, empty), else_=current)
+            if column in values:
+                set_[column] = getattr(q.excluded, column)
+            elif column in merges:
+                set_[column] = current.op("||")(getattr(q.excluded, column))
+            elif self._ttl:  # values of expired record must not come back
+                set_[column] = current
+
+        q = q.on_conflict_do_update(
+            index_elements=[FSMState.chat, FSMState.user], set_=set_
+        )
+        async with session_scope() as session:
+            await session.execute(q)
+
+    def _expired_before(self) -> datetime.datetime:
+        return datetime.datetime.now() - datetime.timedelta(seconds=self._ttl)
+
+
+class JSONRecordStorage(JSONStorage):
+    """JSON file storage reading and writing state and data of record at once"""
+
+    async def get_record(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+    ) -> FSMRecord:
+        chat, user = self.resolve_address(chat=chat, user=user)
+        record = self.data[chat][user]
+        return FSMRecord(record["state"], copy.deepcopy(record["data"]))
+
+    async def set_record(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        **values: Any,
+    ) -> None:
+        chat, user = self.resolve_address(chat=chat, user=user)
+        record = self.data[chat][user]
+        if "state" in values:
+            record["state"] = self.resolve_state(values["state"])
+        if "data" in values:
+            record["data"] = copy.deepcopy(values["data"] or {})
+        self._cleanup(chat, user)
@@ -1,17 +1,41 @@
+import asyncio
+import contextvars
 import logging
+import time
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Awaitable
+from typing import Callable
+from typing import Coroutine
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.services.database.config import async_session
+from src.services.database.config import engine
+from src.utils import metrics
 
 _logger = logging.getLogger(__name__)
+_current_session: ContextVar[AsyncSession | None] = ContextVar(
+    "current_session", default=None
+)
+# session of update transaction, unset inside nested transaction() blocks
+_update_session: ContextVar[AsyncSession | None] = ContextVar(
+    "update_session", default=None
+)
+_checkout_stats = {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0}
 
 
 @asynccontextmanager
 async def session_scope() -> AsyncSession:
+    if (session := _current_session.get()) is not None:
+        # inside transaction(), the enclosing scope commits
+        yield session
+        await session.flush()
+        return
+
     session = async_session()
     try:
+        await _checkout_connection(session)
         yield session
         await session.commit()
     except Exception as e:
@@ -20,3 +44,100 @@ async def session_scope() -> AsyncSession:
         raise
     finally:
         await session.close()
+
+
+@asynccontextmanager
+async def transaction() -> AsyncSession:
+    """Run every session_scope opened inside the block in one session with one commit"""
+
+    async with session_scope() as session:
+        token = _current_session.set(session)
+        # block joined to update transaction must not be committed half done
+        update_token = _update_session.set(None)
+        try:
+            yield session
+        finally:
+            _update_session.reset(update_token)
+            _current_session.reset(token)
+
+
+@asynccontextmanager
+async def update_transaction() -> AsyncSession:
+    """
+    transaction() of whole update, writes made so far can be committed earlier by
+    commit_update(), rest is committed on exit
+    """
+
+    async with transaction() as session:
+        token = _update_session.set(session)
+        try:
+            yield session
+        finally:
+            _update_session.reset(token)
+
+
+async def commit_update() -> None:
+    """
+    Commit writes of update transaction made so far, so they are visible and their
+    row locks and connection are released before slow outbound I/O. Does nothing
+    outside of update transaction or inside nested transaction() block
+    """
+
+    session = _update_session.get()
+    if session is not None and session.in_transaction():
+        await session.commit()
+
+
+def run_detached(coro: Coroutine) -> asyncio.Task:
+    """Run coroutine in a task using its own sessions instead of the transaction ones"""
+
+    context = contextvars.copy_context()
+    context.run(_current_session.set, None)
+    context.run(_update_session.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+async def warmup_pool(warmup: Callable[[], Awaitable], size: int) -> None:
+    """
+    Check out connections at once and run warmup queries on each of them,
+    so connection setup and statement preparing are done before first update
+    :param warmup: coroutine function running queries through session_scope
+    :param size: count of connections to open
+    """
+
+    async def run():
+        async with engine.connect() as connection:
+            session = async_session(bind=connection)
+            token = _current_session.set(session)
+            try:
+                await warmup()
+            finally:
+                _current_session.reset(token)
+                await session.close()
+
+    await asyncio.gather(*(run() for _ in range(size)))
+
+
+def pool_status() -> dict:
+    pool = engine.pool
+    checkouts = _checkout_stats["checkouts"]
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": checkouts,
+        "wait_avg": _checkout_stats["wait_total"] / checkouts if checkouts else 0.0,
+        "wait_max": _checkout_stats["wait_max"],
+    }
+
+
+async def _checkout_connection(session: AsyncSession) -> None:
+    start = time.monotonic()
+    await session.connection()
+    wait = time.monotonic() - start
+    _checkout_stats["checkouts"] += 1
+    _checkout_stats["wait_total"] += wait
+    _checkout_stats["wait_max"] = max(_checkout_stats["wait_max"], wait)
+
+
+metrics.register("database pool", pool_status)
@@ -1,32 +1,171 @@
+import asyncio
+import contextlib
 import datetime
+import multiprocessing
+import tempfile
+from multiprocessing.connection import Connection
 from pathlib import Path
-from typing import Sequence
-import pandas as pd
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Optional
+
+from openpyxl import Workbook
 
 from src.data import settings
-from src.services.database.models import Report, User, Partner
-
-
-async def create_reports_excel(reports: Sequence[Report]) -> Path:
-    data = []
-    for r in reports:
-        user = await User.get(id=r.user)
-        partner = await Partner.get(id=r.partner)
-        data.append(
-            {
-                "Дата и время": r.created_at.strftime("%d.%m.%Y %H:%M:%S"),
-                "Имя пользователя": user.username,
-                "Сумма ставки": f"{r.amount}€",
-                "Сумма возврата": f"{r.refund_amount}€",
-                "Профит": f"{r.profit()}€",
-                "Процент ЗП": f"{r.salary_percent}%",
-                "Партнет": partner.name,
-                "Ошибочный": "Да" if r.erroneous else "Нет",
-            }
+from src.services.database.api import ReportDetails
+from src.services.executor import run_in_process
+
+REPORTS_HEADER = (
+    "Дата и время",
+    "Имя пользователя",
+    "Сумма ставки",
+    "Сумма возврата",
+    "Профит",
+    "Процент ЗП",
+    "Партнет",
+    "Ошибочный",
+)
+
+
+def file_name() -> str:
+    """This function used to get excel file name for current moment"""
+    return datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".xlsx"
+
+
+class ReportsExcel:
+    """Excel file written by process pool worker from reports added one by one"""
+
+    def __init__(self, connection: Connection, written: asyncio.Future, output: Path):
+        self._connection = connection
+        self._written = written
+        self._output = output
+        self._batch = []
+        self.file: Optional[BinaryIO] = None
+
+    async def add(self, details: ReportDetails) -> None:
+        self._batch.append(_report_row(details))
+        if len(self._batch) >= settings.EXCEL_BATCH_SIZE:
+            await self._send(self._batch)
+            self._batch = []
+
+    async def passthrough(
+        self, reports: AsyncIterable[ReportDetails]
+    ) -> AsyncIterator[ReportDetails]:
+        """Add reports while they are iterated by other consumer"""
+        async for details in reports:
+            await self.add(details)
+            yield details
+
+    async def save(self) -> BinaryIO:
+        """
+        Write added reports to file
+        :return: opened excel file, closed and removed on exit
+        """
+        if self._batch:
+            await self._send(self._batch)
+            self._batch = []
+        await self._send(None)
+        await self._written
+        self.file = open(self._output, "rb")
+        return self.file
+
+    async def _send(self, rows: Optional[list[tuple]]) -> None:
+        """Send rows to worker, blocks in thread while pipe is full"""
+        try:
+            await asyncio.to_thread(self._connection.send, rows)
+        except OSError:
+            await self._written  # raises error of worker which closed pipe
+            raise
+
+
+@contextlib.asynccontextmanager
+async def open_reports_excel() -> AsyncIterator[ReportsExcel]:
+    """
+    This function used to write reports to excel file. Rows are sent in batches
+    through a pipe to process pool worker writing them to workbook while they are
+    read from database, so neither memory usage nor event loop depends on reports
+    count
+
+    :return: excel file reports are added to, file removed on exit
+    """
+    connection, worker_connection = multiprocessing.Pipe()
+    with tempfile.TemporaryDirectory() as directory, connection:
+        output = Path(directory) / file_name()
+        written = asyncio.ensure_future(
+            run_in_process(_write_workbook, worker_connection, output)
         )
+        excel = None
+        try:
+            try:
+                await _wait_started(connection, written)
+            finally:
+                # worker has its own copy, pipe breaks if it dies
+                worker_connection.close()
+            excel = ReportsExcel(connection, written, output)
+            yield excel
+        finally:
+            if excel is not None and excel.file is not None:
+                excel.file.close()
+            else:
+                # not saved, export waiting in pool is dropped, running worker stops
+                # on closed pipe and its error is not interesting
+                connection.close()
+                if not written.cancel():
+                    with contextlib.suppress(Exception):
+                        await written
+
+
+async def _wait_started(connection: Connection, written: asyncio.Future) -> None:
+    """Wait until worker takes export, pool can be busy with other ones"""
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+    loop.add_reader(
+        connection.fileno(), lambda: started.done() or started.set_result(None)
+    )
+    try:
+        await asyncio.wait((started, written), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        loop.remove_reader(connection.fileno())
+    if not started.done():
+        await written  # raises error of pool
+    connection.recv()
+
+
+def _report_row(details: ReportDetails) -> tuple:
+    r = details.report
+    return (
+        r.created_at,
+        details.user.username,
+        r.amount,
+        r.refund_amount,
+        r.profit(),
+        r.salary_percent,
+        details.partner.name,
+        r.erroneous,
+    )
+
 
-    file_name = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".xlsx"
-    output_file = settings.PROJECT_DIR / "excel" / file_name
-    df = pd.DataFrame(data=data)
-    df.to_excel(output_file, index=False)
-    return output_file
+def _write_workbook(connection: Connection, output: Path) -> None:
+    """
+    Executed in process pool, writes rows received from connection to write only
+    workbook until None is received
+    """
+    with connection:
+        connection.send(True)  # started
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(REPORTS_HEADER)
+        while (rows := connection.recv()) is not None:
+            for created_at, username, amount, refund, profit, percent, *rest in rows:
+                partner, erroneous = rest
+                sheet.append(
+                    (
+                        created_at.strftime("%d.%m.%Y %H:%M:%S"),
+                        username,
+                        f"{amount}€",
+                        f"{refund}€",
+                        f"{profit}€",
+                        f"{percent}%",
+                        partner,
+                        "Да" if erroneous else "Нет",
+                    )
+                )
+        workbook.save(output)
@@ -0,0 +1,44 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from src.data import settings
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    This function used to get shared process pool, pool created on first use.
+    Workers are spawned, so they don't inherit event loop and database connections
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.EXECUTOR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_process(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run CPU bound function in process pool without blocking event loop
+    :param func: module level function, it and its arguments must be picklable
+    :return: function result
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_pool(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
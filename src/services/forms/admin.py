@@ -41,6 +41,7 @@ class OtherForm(BaseForm):
     remove_user = FormField("➖ Пользователя")
     set_currency = FormField("💱 Изменить валюту")
     manage_partners = FormField("👥 Управлять партнерами")
+    broadcast = FormField("📢 Рассылка всем пользователям")
     back = FormField("🔙 Назад")
 
 
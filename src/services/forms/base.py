@@ -16,20 +16,10 @@ _KeyboardButton: TypeAlias = InlineKeyboardButton | KeyboardButton | str
 
 
 class BaseForm:
-    @classmethod
-    async def validate_message(cls, message: str) -> bool:
-        for button in cls.fields():
-            if message == button.text:
-                return True
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
 
-        return False
-
-    @classmethod
-    def callback_data(cls) -> CallbackData:
-        return CallbackData(cls.__name__, "id")
-
-    @classmethod
-    def fields(cls):
+        # fields are collected once, when form class is defined
         _fields = {}
         _count = 1
         for var, value in cls.__dict__.items():
@@ -40,7 +30,26 @@ class BaseForm:
                 _count += 1
 
         _buttons = namedtuple("fields", list(_fields.keys()))
-        return _buttons(**_fields)
+        cls._fields = _buttons(**_fields)
+        cls._fields_by_text = {}
+        cls._fields_by_id = {}
+        for field in cls._fields:
+            cls._fields_by_text.setdefault(field.text, field)
+            cls._fields_by_id.setdefault(field.id, field)
+        cls._keyboards = {}
+        cls._callback_data = CallbackData(cls.__name__, "id")
+
+    @classmethod
+    async def validate_message(cls, message: str) -> bool:
+        return message in cls._fields_by_text
+
+    @classmethod
+    def callback_data(cls) -> CallbackData:
+        return cls._callback_data
+
+    @classmethod
+    def fields(cls):
+        return cls._fields
 
     @classmethod
     def get_keyboard(
@@ -72,6 +81,10 @@ class BaseForm:
         if exceptions is None:
             exceptions = []
 
+        key = cls._keyboard_key("reply", exceptions, rows_template, row_width)
+        if key in cls._keyboards:
+            return cls._keyboards[key]
+
         keyboard = ReplyKeyboardMarkup(row_width=row_width, resize_keyboard=True)
         fields = [field.text for field in cls.fields() if field.id not in exceptions]
         if rows_template:
@@ -79,6 +92,7 @@ class BaseForm:
         else:
             cls._add_buttons_by_row_width(keyboard, fields, row_width)
 
+        cls._keyboards[key] = keyboard
         return keyboard
 
     @classmethod
@@ -118,6 +132,18 @@ class BaseForm:
         if exceptions is None:
             exceptions = []
 
+        # keyboards with own callback data args differ every call, others are reused
+        key = None
+        if callback_data_args is None:
+            key = cls._keyboard_key(
+                (callback_data.prefix, callback_data.sep),
+                exceptions,
+                rows_template,
+                row_width,
+            )
+            if key in cls._keyboards:
+                return cls._keyboards[key]
+
         keyboard = InlineKeyboardMarkup(row_width=row_width)
 
         buttons = []
@@ -143,8 +169,25 @@ class BaseForm:
         else:
             cls._add_buttons_by_row_width(keyboard, buttons, row_width)
 
+        if key is not None:
+            cls._keyboards[key] = keyboard
         return keyboard
 
+    @classmethod
+    def _keyboard_key(
+        cls,
+        kind: str | tuple,
+        exceptions: KeyboardExceptions,
+        rows_template: Optional[tuple | list[int]],
+        row_width: Optional[int],
+    ) -> tuple:
+        return (
+            kind,
+            tuple(exceptions),
+            tuple(rows_template) if rows_template else None,
+            row_width,
+        )
+
     @classmethod
     def _add_buttons_by_rows_template(
         cls,
@@ -165,19 +208,15 @@ class BaseForm:
 
     @classmethod
     def get_id_by_text(cls, text: str) -> Union[int, None]:
-        for field in cls.fields():
-            if text == field.text:
-                return field.id
+        field = cls._fields_by_text.get(text)
+        if field is not None:
+            return field.id
 
         return
 
     @classmethod
     def get_by_id(cls, id: int | str):
-        for field in cls.fields():
-            if field.id == id:
-                return field
-
-        return
+        return cls._fields_by_id.get(id)
 
 
 class FormField:
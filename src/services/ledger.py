@@ -0,0 +1,142 @@
+import sqlalchemy as sa
+
+from src.data import settings
+from src.services.database.api import (
+    create_user,
+    create_salary,
+    create_bet20_salary,
+    create_charity,
+    create_report,
+    deactive_report,
+    increment_salary,
+    increment_bet20_salary,
+    increment_charity,
+    reset_amounts,
+    update_report_rollup,
+)
+from src.services.database.models import Bet20Salary, Report, Salary, User
+from src.services.database.tools import transaction
+
+
+async def post_report(
+    user: int,
+    photo: str,
+    amount: float,
+    refund_amount: float,
+    salary_percent: int,
+    partner: int,
+    erroneous: bool = False,
+) -> Report:
+    """
+    Create report and post it to user salary, balance and charity in one transaction
+    :param user: report author id
+    :param photo: report photo file id
+    :param amount: bet amount in euro
+    :param refund_amount: refund amount in euro
+    :param salary_percent: salary percent chosen by user
+    :param partner: partner id
+    :param erroneous: is report erroneous
+    :return: created report
+    """
+
+    async with transaction():
+        report = await create_report(
+            user, photo, amount, refund_amount, salary_percent, partner, erroneous
+        )
+        await update_report_rollup(report)
+
+        salary_fraction = salary_percent / 100
+        if partner == settings.BET_20_PARTNER_ID:
+            await increment_bet20_salary(user, report.amount * salary_fraction)
+        elif erroneous:
+            fine_amount = report.amount * 3 * salary_fraction
+            await increment_salary(user, -fine_amount)
+        else:
+            await increment_salary(user, report.amount * salary_fraction)
+
+        # update user balance to report profit
+        balance_deltas = {"balance": report.profit()}
+        if partner == settings.MISHA_PARTNER_ID:
+            balance_deltas["misha_balance"] = report.profit() * 0.5
+        await User.increment_where(User.id == user, **balance_deltas)
+        # update charity balance
+        await increment_charity(user, report.amount * settings.CHARITY_FRACTION)
+
+    return report
+
+
+async def reverse_report(report_id: int) -> Report | None:
+    """
+    Deactivate report and take back everything post_report added in one transaction
+    :param report_id: report id
+    :return: deactivated report or None if it was already inactive
+    """
+
+    async with transaction():
+        report = await deactive_report(report_id)
+        if report is None:
+            return None
+        await update_report_rollup(report, -1)
+
+        if report.partner == settings.BET_20_PARTNER_ID:
+            update_amount = report.profit() * settings.BET_20_SALARY_FRACTION
+            await increment_bet20_salary(report.user, -update_amount)
+        else:
+            salary_fraction = report.salary_percent / 100
+
+            if report.erroneous:
+                fine_amount = report.amount * 3 * salary_fraction
+                await increment_salary(report.user, fine_amount)
+            else:
+                update_amount = report.amount * salary_fraction
+                await increment_salary(report.user, -update_amount)
+
+        # update user balance to report profit
+        balance_deltas = {"balance": -float(report.profit())}
+        if report.partner == settings.MISHA_PARTNER_ID:
+            balance_deltas["misha_balance"] = -(float(report.profit()) * 0.5)
+        await User.increment_where(User.id == report.user, **balance_deltas)
+        # update charity balance
+        update_amount = report.amount * settings.CHARITY_FRACTION
+        await increment_charity(report.user, -update_amount)
+
+    return report
+
+
+async def accept_user(user_id: int, username: str) -> User:
+    """Create user with empty salary, bet 2.0 salary and charity in one transaction"""
+
+    async with transaction():
+        user = await create_user(user_id, username)
+        await create_salary(user_id)
+        await create_bet20_salary(user_id)
+        await create_charity(user_id)
+
+    return user
+
+
+async def pay_salaries(
+    model: type[Salary] | type[Bet20Salary], user: int | None = None
+) -> list[tuple[User, float]]:
+    """
+    Reset positive salaries and take exactly reset amounts from balances of their
+    users in one transaction
+    :param model: Salary or Bet20Salary
+    :param user: user id, None pays salaries of every active user
+    :return: user and paid amount of every paid salary
+    """
+
+    criteria = [model.amount > 0]
+    if user is None:
+        active = sa.select(User.id).filter(User.active == True)
+        criteria.append(model.user.in_(active))
+    else:
+        criteria.append(model.user == user)
+
+    paid = []
+    async with transaction():
+        for user_id, amount in await reset_amounts(model, *criteria):
+            (debited,) = await User.increment_where(User.id == user_id, balance=-amount)
+            paid.append((debited, amount))
+
+    return paid
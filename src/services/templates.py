@@ -1,3 +1,4 @@
+import functools
 import re
 from pathlib import Path
 
@@ -5,6 +6,9 @@ import jinja2
 
 from src.data import settings
 
+# spaces at line start and spaces before other space, new line, dot or comma
+_EXTRA_SPACES = re.compile(r"(?<=\n) +| (?=[ \n.,])")
+
 
 def render_template(
     template_name: str, *, context: dict | None = None, templates_path: Path | None = None
@@ -18,27 +22,54 @@ def render_template(
 
     if context is None:
         context = {}
+    if templates_path is None:
+        templates_path = settings.TEMPLATES_DIR
     template = _get_template_env(templates_path).get_template(template_name)
-    rendered = template.render(**context).replace("\n", " ")
-    rendered = rendered.replace("<br>", "\n")
-    rendered = re.sub(" +", " ", rendered).replace(" .", ".").replace(" ,", ",")
-    rendered = "\n".join(line.strip() for line in rendered.split("\n"))
-    return rendered
+    # template source is normalized on load, only spaces around
+    # rendered expressions and skipped blocks are left to clean up
+    return _EXTRA_SPACES.sub("", template.render(**context)).strip(" ")
 
 
-def _get_template_env(templates_path: Path | None):
-    if templates_path is None:
-        templates_path = settings.TEMPLATES_DIR
+def normalize_source(source: str) -> str:
+    """
+    Normalize template source: new lines are replaced by spaces, <br> by new lines,
+    repeated spaces are collapsed and lines are stripped
+    """
+
+    source = source.replace("\n", " ").replace("<br>", "\n")
+    source = re.sub(" +", " ", source).replace(" .", ".").replace(" ,", ",")
+    return "\n".join(line.strip() for line in source.split("\n"))
+
+
+def _flatten_value(value):
+    """New lines of rendered values are spaces, only <br> of source breaks line"""
+    if isinstance(value, str):
+        return value.replace("\n", " ")
+    return value
+
+
+class NormalizingLoader(jinja2.FileSystemLoader):
+    """File system loader returning normalized template source"""
+
+    def get_source(self, environment: jinja2.Environment, template: str):
+        source, filename, uptodate = super().get_source(environment, template)
+        return normalize_source(source), filename, uptodate
 
-    if not getattr(_get_template_env, "template_env", None):
-        template_loader = jinja2.FileSystemLoader(searchpath=templates_path)
-        env = jinja2.Environment(
-            loader=template_loader,
-            trim_blocks=True,
-            lstrip_blocks=True,
-            autoescape=True,
-        )
 
-        _get_template_env.template_env = env
+@functools.lru_cache
+def _get_template_env(templates_path: Path) -> jinja2.Environment:
+    bytecode_cache = None
+    if settings.TEMPLATES_BYTECODE_CACHE_DIR:
+        directory = Path(settings.TEMPLATES_BYTECODE_CACHE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(str(directory))
 
-    return _get_template_env.template_env
+    return jinja2.Environment(
+        loader=NormalizingLoader(searchpath=templates_path),
+        autoescape=True,
+        finalize=_flatten_value,
+        keep_trailing_newline=True,  # trailing new line of source is <br> here
+        auto_reload=False,  # templates don't change while bot is running
+        cache_size=-1,
+        bytecode_cache=bytecode_cache,
+    )
@@ -81,3 +81,13 @@ class States(StatesGroup):
 
                 class Remove(StatesGroup):
                     partner = State()
+
+            class Broadcast(StatesGroup):
+                text = State()
+
+
+# users offered for selection in state, only admins if True, only not admins if False
+SELECT_USERS_IS_ADMIN = {
+    States.Admin.Other.AddAdmin.user.state: False,
+    States.Admin.Other.RemoveAdmin.user.state: True,
+}
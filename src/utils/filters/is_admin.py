@@ -1,6 +1,6 @@
 from aiogram import types
 from aiogram.dispatcher.filters import BoundFilter
-from src.services.database.models import User
+from aiogram.dispatcher.handler import ctx_data
 
 
 class IsAdmin(BoundFilter):
@@ -10,10 +10,11 @@ class IsAdmin(BoundFilter):
         self.is_admin = is_admin
 
     async def check(self, message: types.Message):
-        chat = message.message.chat if isinstance(message, types.CallbackQuery) else message.chat
-        if chat.type != types.ChatType.PRIVATE:
-            return False
-        user = await User.get(id=message.from_user.id)
-        if user:
-            return user.is_admin
-        return False
+        # inline queries have no chat, they are checked by user only
+        if not isinstance(message, types.InlineQuery):
+            chat = message.message.chat if isinstance(message, types.CallbackQuery) else message.chat
+            if chat.type != types.ChatType.PRIVATE:
+                return False
+        # flag is resolved by UserContextMiddleware before filters are checked, user
+        # unknown to it is not admin
+        return (ctx_data.get() or {}).get("is_admin", False)
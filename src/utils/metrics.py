@@ -0,0 +1,27 @@
+import asyncio
+import logging
+from typing import Callable
+
+_logger = logging.getLogger(__name__)
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    """
+    Register metrics provider
+    :param name: metrics group name
+    :param provider: function returning current metrics of the group
+    """
+
+    _providers[name] = provider
+
+
+def collect() -> dict[str, dict]:
+    return {name: provider() for name, provider in _providers.items()}
+
+
+async def log_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        for name, values in collect().items():
+            _logger.info("{}: {}".format(name, values))
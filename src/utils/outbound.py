@@ -0,0 +1,237 @@
+import asyncio
+import contextvars
+import enum
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from aiogram.utils.exceptions import RetryAfter
+
+from src.data import settings
+from src.utils import metrics
+
+T = TypeVar("T")
+
+_logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """Outbound lanes, lower value is sent first"""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate: tokens added per second
+        :param capacity: max tokens, burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until token is available"""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def full_delay(self) -> float:
+        """Seconds until bucket is full again"""
+        self._refill()
+        return (self.capacity - self._tokens) / self.rate
+
+    def consume(self) -> None:
+        self._tokens -= 1
+
+    async def acquire(self) -> None:
+        while (delay := self.delay()) > 0:
+            await asyncio.sleep(delay)
+        self.consume()
+
+
+class PriorityLimiter:
+    """Token bucket shared by all chats, waiters are served by priority"""
+
+    def __init__(self, rate: float, capacity: float):
+        self._bucket = TokenBucket(rate, capacity)
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority) -> None:
+        if not self._waiters and self._bucket.delay() == 0:
+            self._bucket.consume()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(
+                self._dispatch(), context=contextvars.Context()
+            )
+        await future
+
+    async def _dispatch(self) -> None:
+        try:
+            while self._waiters:
+                future = self._waiters[0][2]
+                if future.done():  # waiter cancelled
+                    heapq.heappop(self._waiters)
+                    continue
+                delay = self._bucket.delay()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                heapq.heappop(self._waiters)
+                self._bucket.consume()
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
+
+
+class _Chat:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.queue: list[tuple[int, int, Callable, asyncio.Future]] = []
+        self.worker: Optional[asyncio.Task] = None
+
+
+class OutboundScheduler:
+    """
+    Queue for all outgoing bot requests. Every chat has own FIFO per priority and
+    own rate limit, all chats together are limited by global rate.
+    RetryAfter from telegram pauses the chat and request is retried
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        chat_rate: float,
+        chat_burst: float,
+        group_rate: float,
+        group_burst: float,
+        max_retries: int,
+    ):
+        self._limiter = PriorityLimiter(rate, rate)
+        self._chat_rate, self._chat_burst = chat_rate, chat_burst
+        self._group_rate, self._group_burst = group_rate, group_burst
+        self._max_retries = max_retries
+        self._chats: dict[int, _Chat] = {}
+        self._counter = itertools.count()
+        self._sent = 0
+        self._retries = 0
+        self._failed = 0
+
+    async def submit(
+        self,
+        chat_id: int,
+        request: Callable[[], Awaitable[T]],
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> T:
+        """
+        Send request to chat respecting rate limits
+        :param chat_id: chat request is addressed to
+        :param request: function making request, may be called several times on retry
+        :param priority: request lane
+        :return: request result
+        """
+
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat(self._create_bucket(chat_id))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(chat.queue, (priority, next(self._counter), request, future))
+        if chat.worker is None:
+            chat.worker = asyncio.create_task(
+                self._run_chat(chat_id, chat), context=contextvars.Context()
+            )
+        return await future
+
+    def _create_bucket(self, chat_id: int) -> TokenBucket:
+        if chat_id < 0:  # groups and channels
+            return TokenBucket(self._group_rate, self._group_burst)
+        return TokenBucket(self._chat_rate, self._chat_burst)
+
+    async def _run_chat(self, chat_id: int, chat: _Chat) -> None:
+        try:
+            while True:
+                while chat.queue:
+                    priority, _, request, future = heapq.heappop(chat.queue)
+                    if future.done():  # caller cancelled
+                        continue
+                    await chat.bucket.acquire()
+                    await self._limiter.acquire(priority)
+                    await self._send(chat_id, request, future)
+
+                # keep chat while its limit matters, so it can't burst again
+                await asyncio.sleep(chat.bucket.full_delay())
+                if not chat.queue:
+                    break
+        finally:
+            chat.worker = None
+            if not chat.queue:
+                self._chats.pop(chat_id, None)
+
+    async def _send(self, chat_id: int, request: Callable, future: asyncio.Future):
+        for attempt in itertools.count():
+            try:
+                result = await request()
+            except RetryAfter as e:
+                if attempt >= self._max_retries or future.done():
+                    self._failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+                self._retries += 1
+                _logger.warning(
+                    "Flood limit for chat {}, retry in {}s".format(chat_id, e.timeout)
+                )
+                await asyncio.sleep(e.timeout)
+            except Exception as e:
+                self._failed += 1
+                if not future.done():
+                    future.set_exception(e)
+                return
+            else:
+                self._sent += 1
+                if not future.done():
+                    future.set_result(result)
+                return
+
+    def status(self) -> dict:
+        return {
+            "chats": len(self._chats),
+            "queued": sum(len(chat.queue) for chat in self._chats.values()),
+            "waiting_global": self._limiter.waiting,
+            "sent": self._sent,
+            "retries": self._retries,
+            "failed": self._failed,
+        }
+
+
+scheduler = OutboundScheduler(
+    rate=settings.OUTBOUND_RATE / settings.PROCESSES,  # every process has own one
+    chat_rate=settings.OUTBOUND_CHAT_RATE,
+    chat_burst=settings.OUTBOUND_CHAT_BURST,
+    group_rate=settings.OUTBOUND_GROUP_RATE_PER_MINUTE / 60,
+    group_burst=settings.OUTBOUND_GROUP_BURST,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
+metrics.register("outbound", scheduler.status)
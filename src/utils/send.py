@@ -1,13 +1,51 @@
-from typing import Optional
+import asyncio
+import functools
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterable, BinaryIO, Iterable, Optional
 
 from aiogram import types
+from aiogram.utils import exceptions
 
+from src.data import settings
 from src.loader import bot
-from src.services.database.api import get_admin_users
+from src.services.database.api import (
+    ReportDetails,
+    deactivate_users,
+    get_admin_users,
+)
 from src.services.database.models import Currency, Partner
+from src.services.database.tools import commit_update
 from src.services.templates import render_template
 from src.services.forms import confirm_form
-from src.keyboards.inline.callbacks import confirm_report
+from src.services.forms.admin import delete_report_form
+from src.keyboards.inline import get_album_index_keyboard
+from src.keyboards.inline.callbacks import confirm_report, delete_report
+from src.utils.outbound import Priority, scheduler
+
+_logger = logging.getLogger(__name__)
+
+# errors meaning that user can't receive messages anymore
+UNREACHABLE_ERRORS = (
+    exceptions.BotBlocked,
+    exceptions.UserDeactivated,
+    exceptions.ChatNotFound,
+)
+
+
+@dataclass(frozen=True)
+class BroadcastResult:
+    user_id: int
+    message: Optional[types.Message] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def unreachable(self) -> bool:
+        return isinstance(self.error, UNREACHABLE_ERRORS)
 
 
 async def get_chat_id() -> int:
@@ -26,6 +64,7 @@ async def send_message(
     user_id: Optional[int] = None,
     photo: Optional[str | types.InputFile] = None,
     reply_to_message_id: Optional[int] = None,
+    priority: Priority = Priority.INTERACTIVE,
 ) -> types.Message:
     """
     This function used to send message to user, with default keyboard if keyboard not given in arg
@@ -37,6 +76,7 @@ async def send_message(
     :param user_id: to message user id
     :param photo: photo sent with message
     :param reply_to_message_id: reply to message id
+    :param priority: outbound lane, listings should use bulk lane
     :return: sent message
     """
 
@@ -47,7 +87,8 @@ async def send_message(
         reply_markup = types.ReplyKeyboardRemove()
 
     if photo:
-        return await bot.send_photo(
+        request = functools.partial(
+            bot.send_photo,
             user_id,
             photo=photo,
             caption=message_text,
@@ -55,13 +96,150 @@ async def send_message(
             reply_markup=reply_markup,
             reply_to_message_id=reply_to_message_id,
         )
+    else:
+        request = functools.partial(
+            bot.send_message,
+            user_id,
+            message_text,
+            reply_markup=reply_markup,
+            parse_mode=parse_mode,
+            reply_to_message_id=reply_to_message_id,
+        )
+
+    return await _submit(user_id, request, priority)
+
+
+async def send_document(
+    document: BinaryIO | types.InputFile,
+    user_id: Optional[int] = None,
+    priority: Priority = Priority.BULK,
+) -> types.Message:
+    """
+    This function used to send document to user
+    :param document: opened file, it must stay open until message is sent
+    :param user_id: to message user id
+    :param priority: outbound lane
+    :return: sent message
+    """
+
+    if not user_id:
+        user_id = await get_chat_id()
 
-    return await bot.send_message(
-        user_id,
-        message_text,
+    request = functools.partial(bot.send_document, user_id, document)
+    return await _submit(user_id, request, priority)
+
+
+async def _submit(user_id: int, request: functools.partial, priority: Priority):
+    # user must not see result before it is committed, and row locks must not be
+    # held while request waits for its turn
+    await commit_update()
+    return await scheduler.submit(user_id, request, priority)
+
+
+async def send_reports(
+    reports: AsyncIterable[ReportDetails],
+    template_name: str,
+    deletable: bool = False,
+    user_id: Optional[int] = None,
+    priority: Priority = Priority.BULK,
+) -> int:
+    """
+    This function used to send reports listing, reports with photo are grouped to
+    albums, reports without photo are sent as separate messages keeping order
+
+    :param reports: reports to send
+    :param template_name: report template, rendered to caption of every photo
+    :param deletable: add delete buttons, for albums via index message replied to it
+    :param user_id: to message user id
+    :param priority: outbound lane
+    :return: count of sent reports
+    """
+
+    if not user_id:
+        user_id = await get_chat_id()
+
+    count = 0
+    album: list[ReportDetails] = []
+    async for details in reports:
+        count += 1
+        if not details.report.photo:
+            await _send_album(album, template_name, deletable, user_id, priority)
+            await _send_report(details, template_name, deletable, user_id, priority)
+            album = []
+            continue
+
+        album.append(details)
+        if len(album) == settings.ALBUM_SIZE:
+            await _send_album(album, template_name, deletable, user_id, priority)
+            album = []
+
+    await _send_album(album, template_name, deletable, user_id, priority)
+    return count
+
+
+async def _send_album(
+    album: list[ReportDetails],
+    template_name: str,
+    deletable: bool,
+    user_id: int,
+    priority: Priority,
+) -> None:
+    if len(album) < 2:  # media group requires at least two items
+        for details in album:
+            await _send_report(details, template_name, deletable, user_id, priority)
+        return
+
+    media = types.MediaGroup()
+    for details in album:
+        media.attach_photo(
+            details.report.photo,
+            caption=_render_report(details, template_name),
+            parse_mode="HTML",
+        )
+    messages = await _submit(
+        user_id, functools.partial(bot.send_media_group, user_id, media), priority
+    )
+    if deletable:
+        await send_message(
+            render_template("admin/album_index.j2", context={"reports": album}),
+            reply_markup=get_album_index_keyboard([d.report for d in album]),
+            user_id=user_id,
+            reply_to_message_id=messages[0].message_id,
+            priority=priority,
+        )
+
+
+async def _send_report(
+    details: ReportDetails,
+    template_name: str,
+    deletable: bool,
+    user_id: int,
+    priority: Priority,
+) -> None:
+    reply_markup = None
+    if deletable:
+        reply_markup = delete_report_form.get_inline_keyboard(
+            callback_data=delete_report,
+            callback_data_args={"report_id": details.report.id},
+        )
+    await send_message(
+        _render_report(details, template_name),
         reply_markup=reply_markup,
-        parse_mode=parse_mode,
-        reply_to_message_id=reply_to_message_id,
+        user_id=user_id,
+        photo=details.report.photo,
+        priority=priority,
+    )
+
+
+def _render_report(details: ReportDetails, template_name: str) -> str:
+    return render_template(
+        template_name,
+        context={
+            "report": details.report,
+            "partner": details.partner,
+            "user": details.user,
+            "currency": details.currency,
+        },
     )
 
 
@@ -75,17 +253,75 @@ async def send_message_to_admins(
     parse_mode: str = "HTML",
     photo: Optional[str | types.InputFile] = None,
     reply_to_message_id: Optional[int] = None,
-) -> None:
+    priority: Priority = Priority.INTERACTIVE,
+) -> list[BroadcastResult]:
     admins = await get_admin_users()
-    for admin in admins:
-        await send_message(
-            message_text=message_text,
-            reply_markup=reply_markup,
-            parse_mode=parse_mode,
-            photo=photo,
-            reply_to_message_id=reply_to_message_id,
-            user_id=admin.id,
-        )
+    return await broadcast(
+        [admin.id for admin in admins],
+        message_text=message_text,
+        reply_markup=reply_markup,
+        parse_mode=parse_mode,
+        photo=photo,
+        reply_to_message_id=reply_to_message_id,
+        priority=priority,
+    )
+
+
+async def broadcast(
+    users: Iterable[int],
+    message_text: str,
+    reply_markup: Optional[
+        types.ReplyKeyboardMarkup
+        | types.InlineKeyboardMarkup
+        | types.ReplyKeyboardRemove
+    ] = None,
+    parse_mode: str = "HTML",
+    photo: Optional[str | types.InputFile] = None,
+    reply_to_message_id: Optional[int] = None,
+    priority: Priority = Priority.BULK,
+    concurrency: int = settings.BROADCAST_CONCURRENCY,
+) -> list[BroadcastResult]:
+    """
+    This function used to send same message to many users concurrently,
+    users who blocked bot or deleted account are deactivated
+
+    :param users: recipients ids
+    :param message_text: message text
+    :param reply_markup: keyboard sent with message
+    :param parse_mode: message parse mode
+    :param photo: photo sent with message
+    :param reply_to_message_id: reply to message id
+    :param priority: outbound lane
+    :param concurrency: max messages waiting for delivery at once
+    :return: result for every recipient in the same order
+    """
+
+    # commit once here, concurrent sends must not commit the same session
+    await commit_update()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(user_id: int) -> BroadcastResult:
+        async with semaphore:
+            try:
+                message = await send_message(
+                    message_text,
+                    reply_markup=reply_markup,
+                    parse_mode=parse_mode,
+                    user_id=user_id,
+                    photo=photo,
+                    reply_to_message_id=reply_to_message_id,
+                    priority=priority,
+                )
+            except exceptions.TelegramAPIError as e:
+                _logger.warning("Broadcast to {} failed: {}".format(user_id, e))
+                return BroadcastResult(user_id, error=e)
+            return BroadcastResult(user_id, message=message)
+
+    results = await asyncio.gather(*(send(user_id) for user_id in users))
+    unreachable = [r.user_id for r in results if r.unreachable]
+    if unreachable:
+        await deactivate_users(unreachable)
+    return results
 
 
 async def send_confirm_report(
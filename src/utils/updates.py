@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiogram import Dispatcher, types
+
+from src.utils import metrics
+
+
+def chat_key(update: types.Update) -> Hashable:
+    """
+    Key of chat update belongs to, updates of private chat and of its user have the
+    same key. Updates without chat or user get own key
+    """
+
+    for obj in (
+        update.message,
+        update.edited_message,
+        update.channel_post,
+        update.edited_channel_post,
+        update.my_chat_member,
+        update.chat_member,
+        update.chat_join_request,
+    ):
+        if obj:
+            return obj.chat.id
+
+    if update.callback_query:
+        if update.callback_query.message:
+            return update.callback_query.message.chat.id
+        return update.callback_query.from_user.id
+
+    for obj in (
+        update.inline_query,
+        update.chosen_inline_result,
+        update.shipping_query,
+        update.pre_checkout_query,
+    ):
+        if obj:
+            return obj.from_user.id
+
+    if update.poll_answer:
+        return update.poll_answer.user.id
+    return "update", update.update_id
+
+
+class _Item:
+    __slots__ = ("update", "future", "context", "enqueued_at")
+
+    def __init__(self, update: types.Update, future: asyncio.Future):
+        self.update = update
+        self.future = future
+        # handlers see context vars of receiver, like bot and dispatcher
+        self.context = contextvars.copy_context()
+        self.enqueued_at = time.monotonic()
+
+
+class ChatOrderedProcessor:
+    """
+    Process updates of one chat one by one in arrival order, updates of different
+    chats in parallel by bounded count of workers. Chat with pending updates waits
+    in ready queue, so workers take chats in turns. Callback queries are ordered
+    too, so pressed button is answered only after long listing sent to the same
+    chat is finished
+    """
+
+    def __init__(self, handle: Callable[[types.Update], Awaitable], workers: int):
+        """
+        :param handle: function processing single update
+        :param workers: max updates processed at once
+        """
+        self._handle = handle
+        self._workers_count = workers
+        self._workers: list[asyncio.Task] = []
+        # chats with pending or processing updates
+        self._chats: dict[Hashable, deque[_Item]] = {}
+        self._ready: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._busy = 0
+        self._processed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def submit(self, update: types.Update) -> Any:
+        """
+        Queue update and wait until it is processed
+        :return: result of handle
+        """
+
+        key = chat_key(update)
+        item = _Item(update, asyncio.get_running_loop().create_future())
+        queue = self._chats.get(key)
+        if queue is None:
+            queue = self._chats[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append(item)
+
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work(), context=contextvars.Context())
+                for _ in range(self._workers_count)
+            ]
+        return await item.future
+
+    async def _work(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._chats[key]
+            item = queue.popleft()
+
+            wait = time.monotonic() - item.enqueued_at
+            self._processed += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+            self._busy += 1
+            try:
+                result = await asyncio.create_task(
+                    self._handle(item.update), context=item.context
+                )
+            except asyncio.CancelledError:
+                if not item.future.done():
+                    item.future.cancel()
+                if asyncio.current_task().cancelling():  # worker itself stopped
+                    raise
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            else:
+                if not item.future.done():
+                    item.future.set_result(result)
+            finally:
+                self._busy -= 1
+                # next update of chat goes to the end of ready queue
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+
+    def status(self) -> dict:
+        processed = self._processed
+        return {
+            "workers": self._workers_count,
+            "busy": self._busy,
+            "chats": len(self._chats),
+            "queued": sum(len(queue) for queue in self._chats.values()),
+            "processed": processed,
+            "wait_avg": self._wait_total / processed if processed else 0.0,
+            "wait_max": self._wait_max,
+        }
+
+
+def install(dispatcher: Dispatcher, workers: int) -> ChatOrderedProcessor:
+    """
+    Route every update of dispatcher, received by polling or webhook, through
+    per chat queues
+    :param workers: max updates processed at once
+    """
+
+    processor = ChatOrderedProcessor(dispatcher.updates_handler.notify, workers)
+    dispatcher.updates_handler.notify = processor.submit
+    metrics.register("updates", processor.status)
+    return processor
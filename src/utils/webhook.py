@@ -0,0 +1,49 @@
+import hmac
+
+from aiogram import Dispatcher
+from aiogram.dispatcher.webhook import BOT_DISPATCHER_KEY, WebhookRequestHandler
+from aiohttp import web
+
+from src.data import settings
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+@web.middleware
+async def check_secret_token(request: web.Request, handler):
+    if request.path == settings.WEBHOOK_PATH and settings.WEBHOOK_SECRET:
+        token = request.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(token, settings.WEBHOOK_SECRET):
+            raise web.HTTPUnauthorized()
+    return await handler(request)
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+def create_app(dispatcher: Dispatcher) -> web.Application:
+    """
+    Create web app taking updates posted to WEBHOOK_PATH with secret token header,
+    the same way telegram or local test client does, and serving /health
+    :param dispatcher: dispatcher processing updates
+    """
+
+    app = web.Application(middlewares=[check_secret_token])
+    app[BOT_DISPATCHER_KEY] = dispatcher
+    app.router.add_route(
+        "*", settings.WEBHOOK_PATH, WebhookRequestHandler, name="webhook_handler"
+    )
+    app.router.add_get("/health", health)
+    return app
+
+
+async def set_webhook(dispatcher: Dispatcher) -> None:
+    """Point telegram to WEBHOOK_HOST, if it is set"""
+
+    if not settings.WEBHOOK_HOST:
+        return
+    await dispatcher.bot.set_webhook(
+        settings.WEBHOOK_HOST.rstrip("/") + settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET or None,
+    )
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.utils.exceptions import NetworkError
+
+from src.loader import bot, dp
+from src.utils.updates import chat_key
+
+_logger = logging.getLogger(__name__)
+
+Callback = Callable[[Dispatcher], Awaitable]
+
+
+def run_polling(workers: int, on_startup: Callback, on_shutdown: Callback) -> None:
+    """
+    Poll updates in this process and process them in spawned worker processes,
+    updates of one chat always go to the same worker, so they stay in order
+    :param workers: count of worker processes
+    :param on_startup: called with dispatcher in every worker before processing
+    :param on_shutdown: called with dispatcher in every worker after processing
+    """
+
+    pool = WorkerPool(workers, on_startup, on_shutdown)
+    pool.start()
+    try:
+        asyncio.run(_poll(pool))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+
+
+class WorkerPool:
+    """Spawned worker processes, every worker processes updates put to its queue"""
+
+    def __init__(self, workers: int, on_startup: Callback, on_shutdown: Callback):
+        """
+        :param workers: count of worker processes
+        :param on_startup: called with dispatcher in every worker before processing
+        :param on_shutdown: called with dispatcher in every worker after processing
+        """
+        self._context = multiprocessing.get_context("spawn")
+        self._callbacks = (on_startup, on_shutdown)
+        self.queues: list[Optional[multiprocessing.Queue]] = [None] * workers
+        self.processes: list[Optional[multiprocessing.Process]] = [None] * workers
+
+    def start(self) -> None:
+        for number in range(len(self.processes)):
+            self._start_worker(number)
+
+    def dispatch(self, update: types.Update) -> None:
+        """
+        Put update to queue of worker processing its chat, worker found dead is
+        restarted first
+        """
+
+        number = hash(chat_key(update)) % len(self.queues)
+        if not self.processes[number].is_alive():
+            self._restart_worker(number)
+        self.queues[number].put(update.to_python())
+
+    def stop(self) -> None:
+        """Let workers process queued updates and wait until they exit"""
+
+        for queue, process in zip(self.queues, self.processes):
+            if process.is_alive():
+                queue.put(None)
+        for process in self.processes:
+            process.join()
+
+    def _start_worker(self, number: int) -> None:
+        # new queue, worker killed while waiting for update keeps read lock of its one
+        self.queues[number] = self._context.Queue()
+        self.processes[number] = self._context.Process(
+            target=_run_worker,
+            args=(self.queues[number], *self._callbacks),
+            name="worker-{}".format(number),
+        )
+        self.processes[number].start()
+
+    def _restart_worker(self, number: int) -> None:
+        process = self.processes[number]
+        process.join()
+        _logger.error(
+            "{} exited with code {}, its queued and unfinished updates are lost, "
+            "restarting".format(process.name, process.exitcode)
+        )
+        self._start_worker(number)
+
+
+async def _poll(pool: WorkerPool) -> None:
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, asyncio.current_task().cancel
+    )
+    offset = None
+    try:
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=20)
+            except NetworkError as e:
+                _logger.error("Polling failed: {}".format(e))
+                await asyncio.sleep(1)
+                continue
+
+            for update in updates:
+                pool.dispatch(update)
+                offset = update.update_id + 1
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await (await bot.get_session()).close()
+
+
+def _run_worker(
+    queue: multiprocessing.Queue, on_startup: Callback, on_shutdown: Callback
+) -> None:
+    # parent stops workers by sentinel when it is interrupted or terminated, so
+    # queued updates are processed
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_serve(queue, on_startup, on_shutdown))
+
+
+async def _serve(
+    queue: multiprocessing.Queue, on_startup: Callback, on_shutdown: Callback
+) -> None:
+    Bot.set_current(dp.bot)
+    Dispatcher.set_current(dp)
+    await on_startup(dp)
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    try:
+        while (data := await loop.run_in_executor(None, queue.get)) is not None:
+            task = asyncio.create_task(dp.process_updates([types.Update(**data)]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+    finally:
+        await on_shutdown(dp)
+        await dp.storage.close()
+        await dp.storage.wait_closed()
+        await (await dp.bot.get_session()).close()
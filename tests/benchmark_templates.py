@@ -0,0 +1,67 @@
+"""
+Render time of hot templates, a report caption and salaries table of 30 users
+
+python3 -m tests.benchmark_templates [renders]
+"""
+import datetime
+import sys
+import timeit
+from types import SimpleNamespace
+
+from src.services.templates import render_template
+
+REPEAT = 5
+
+
+class _Currency:
+    symbol = "$"
+
+    @staticmethod
+    def convert_from_eur(amount: float) -> float:
+        return round(amount * 1.1, 2)
+
+
+def _contexts() -> dict[str, dict]:
+    now = datetime.datetime.now()
+    report = SimpleNamespace(
+        amount=10.123,
+        refund_amount=1,
+        salary_percent=12,
+        erroneous=True,
+        created_at=now,
+    )
+    salaries = [
+        {
+            "user": SimpleNamespace(username="user{}".format(i), balance=i * 10),
+            "salary": SimpleNamespace(
+                amount=i, last_debiting_at=None if i % 2 else now
+            ),
+        }
+        for i in range(30)
+    ]
+    return {
+        "report.j2": {
+            "report": report,
+            "partner": SimpleNamespace(name="partner"),
+            "currency": _Currency(),
+        },
+        "admin/user_salaries.j2": {"data": salaries},
+    }
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, context in _contexts().items():
+        render_template(name, context=context)  # template is loaded once
+        best = min(
+            timeit.repeat(
+                lambda: render_template(name, context=context),
+                number=number,
+                repeat=REPEAT,
+            )
+        )
+        print("{}: {:.1f} us per render".format(name, best / number * 1e6))
+
+
+if __name__ == "__main__":
+    main()
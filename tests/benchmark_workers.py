@@ -0,0 +1,117 @@
+"""
+Throughput of worker mode by count of worker processes. Updates go through
+the same queues, dispatcher and per chat ordering as polled ones, handler only
+renders a page of reports. Handler does not wait for I/O, so a single process is
+not held back by its limit of concurrent updates and speedup is bounded by
+count of CPUs, not by count of processes
+
+python3 -m tests.benchmark_workers [updates] [max workers]
+"""
+import datetime
+import functools
+import multiprocessing
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from aiogram import Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from src.services.templates import render_template
+from src.utils import workers
+
+CHATS = 500
+PAGE_SIZE = 20  # reports rendered by one update
+
+
+class _Currency:
+    symbol = "$"
+
+    @staticmethod
+    def convert_from_eur(amount: float) -> float:
+        return round(amount * 1.1, 2)
+
+
+async def _handle(message: types.Message):
+    context = {
+        "report": SimpleNamespace(
+            amount=message.message_id,
+            refund_amount=0,
+            salary_percent=12,
+            erroneous=False,
+            created_at=datetime.datetime.now(),
+        ),
+        "partner": SimpleNamespace(name="partner"),
+        "currency": _Currency(),
+    }
+    for _ in range(PAGE_SIZE):
+        render_template("report.j2", context=context)
+
+
+async def _on_startup(ready: multiprocessing.Queue, dispatcher: Dispatcher):
+    # no database and no state files, only dispatching and handler work
+    dispatcher.middleware.applications.clear()
+    dispatcher.storage = MemoryStorage()
+    dispatcher.register_message_handler(_handle)
+    ready.put(None)
+
+
+async def _on_shutdown(dispatcher: Dispatcher):
+    pass
+
+
+def _update(number: int) -> types.Update:
+    chat = {"id": number % CHATS + 1, "type": "private"}
+    return types.Update(
+        update_id=number,
+        message={
+            "message_id": number,
+            "date": 0,
+            "chat": chat,
+            "from": {"id": chat["id"], "is_bot": False, "first_name": "user"},
+            "text": "report",
+        },
+    )
+
+
+def run(count: int, updates: list[types.Update]) -> float:
+    """
+    :return: seconds spent from first update to exit of last worker
+    """
+
+    ready = multiprocessing.get_context("spawn").Queue()
+    on_startup = functools.partial(_on_startup, ready)
+    pool = workers.WorkerPool(count, on_startup, _on_shutdown)
+    pool.start()
+    for _ in range(count):
+        ready.get()
+
+    start = time.monotonic()
+    for update in updates:
+        pool.dispatch(update)
+    pool.stop()
+    return time.monotonic() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    updates = [_update(number) for number in range(count)]
+    print("{} CPUs".format(os.cpu_count()))
+
+    single = None
+    for workers_count in (1, 2, 4, 8, 16):
+        if workers_count > max_workers:
+            break
+        elapsed = run(workers_count, updates)
+        single = single or elapsed
+        print(
+            "{} workers: {:.0f} updates/s, x{:.2f}".format(
+                workers_count, count / elapsed, single / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
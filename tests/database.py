@@ -0,0 +1,90 @@
+import contextlib
+import datetime
+import unittest
+from typing import Any, Iterator
+from unittest import mock
+
+import sqlalchemy as sa
+from sqlalchemy import event
+
+from src.data import settings
+from src.services.database.base import Model
+from src.services.database.config import engine
+from src.services.database.models import Currency, Partner, Report, User
+from src.services.database.tools import session_scope
+from tests import TEST_POSTGRESQL_URI
+
+
+@unittest.skipUnless(TEST_POSTGRESQL_URI, "TEST_POSTGRESQL_URI is not set")
+class DatabaseTestCase(unittest.IsolatedAsyncioTestCase):
+    """Test case running on empty schema created in test database, without cache"""
+
+    async def asyncSetUp(self):
+        patcher = mock.patch.object(settings, "CACHE_TTL", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        async with engine.begin() as connection:
+            await connection.run_sync(Model.metadata.drop_all)
+            await connection.run_sync(Model.metadata.create_all)
+
+    async def asyncTearDown(self):
+        # connections belong to event loop of the test
+        await engine.dispose()
+
+    @contextlib.contextmanager
+    def capture_queries(self) -> Iterator[list[tuple[str, Any]]]:
+        """Collect statement and parameters of every query executed in block"""
+
+        queries = []
+
+        def before_cursor_execute(connection, cursor, statement, parameters, *args):
+            queries.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield queries
+        finally:
+            event.remove(
+                engine.sync_engine, "before_cursor_execute", before_cursor_execute
+            )
+
+    async def seed_reports(
+        self,
+        users: int,
+        partners: int,
+        reports: int,
+        start: datetime.datetime,
+        step: datetime.timedelta = datetime.timedelta(minutes=1),
+    ) -> None:
+        """Create users with currencies, partners and reports step apart"""
+
+        rows = {
+            Currency: [
+                {"id": 1, "name": "Euro", "symbol": "€", "exchange_rate": 1.0},
+                {"id": 2, "name": "Dollar", "symbol": "$", "exchange_rate": 1.1},
+            ],
+            User: [
+                {"id": i, "username": "user{}".format(i), "currency": i % 2 + 1}
+                for i in range(1, users + 1)
+            ],
+            Partner: [
+                {"id": i, "name": "partner{}".format(i)} for i in range(1, partners + 1)
+            ],
+            Report: [
+                {
+                    "user": i % users + 1,
+                    "partner": i % partners + 1,
+                    "photo": "photo{}".format(i) if i % 3 else None,
+                    "amount": 10 + i,
+                    "refund_amount": i % 5,
+                    "salary_percent": 12,
+                    "erroneous": i % 7 == 0,
+                    "created_at": start + step * i,
+                }
+                for i in range(reports)
+            ],
+        }
+        async with session_scope() as session:
+            for model, values in rows.items():
+                await session.execute(sa.insert(model), values)
@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.data import settings
+from src.services.database import cache
+
+
+class _Model:
+    pass
+
+
+class VersionedCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = 0
+
+        @cache.versioned(_Model)
+        async def build(page: int = 0):
+            self.calls += 1
+            return page
+
+        self.build = build
+
+    @mock.patch.object(settings, "CACHE_TTL", 60)
+    async def test_result_cached_until_model_written(self):
+        await self.build()
+        await self.build()
+        self.assertEqual(self.calls, 1)
+
+        cache._drop(_Model, None)
+        await self.build()
+        self.assertEqual(self.calls, 2)
+
+    @mock.patch.object(settings, "CACHE_TTL", 0.05)
+    async def test_result_expires_after_ttl(self):
+        await self.build()
+        await self.build()
+        self.assertEqual(self.calls, 1)
+
+        await asyncio.sleep(0.1)
+        await self.build()
+        self.assertEqual(self.calls, 2)
+
+    @mock.patch.object(settings, "CACHE_TTL", 0)
+    async def test_disabled_without_ttl(self):
+        await self.build()
+        await self.build()
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,85 @@
+import asyncio
+import datetime
+import time
+import unittest
+from types import SimpleNamespace
+
+from openpyxl import load_workbook
+
+from src.services import executor
+from src.services.database.api import ReportDetails
+from src.services.database.models import Report
+from src.services.excel import open_reports_excel
+
+ROWS = 30000
+PAGE_SIZE = 200  # rows of one database page
+TICK = 0.01
+MAX_LAG = 0.1
+
+
+async def _reports(count: int):
+    created_at = datetime.datetime(2024, 1, 1)
+    user = SimpleNamespace(username="user")
+    partner = SimpleNamespace(name="partner")
+    for number in range(count):
+        if number % PAGE_SIZE == 0:
+            await asyncio.sleep(0)  # page is read from database
+        report = Report(
+            created_at=created_at,
+            amount=number,
+            refund_amount=1,
+            salary_percent=12,
+            erroneous=False,
+        )
+        yield ReportDetails(report, user, partner, None)
+
+
+def _read_rows(file) -> list[tuple]:
+    sheet = load_workbook(file, read_only=True).active
+    return list(sheet.iter_rows(values_only=True))
+
+
+class ExcelExportLatencyTest(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        executor.shutdown()
+
+    async def test_export_does_not_block_event_loop(self):
+        lags = []
+        done = asyncio.Event()
+
+        async def measure():
+            while not done.is_set():
+                start = time.monotonic()
+                await asyncio.sleep(TICK)
+                lags.append(time.monotonic() - start - TICK)
+
+        ticker = asyncio.create_task(measure())
+        async with open_reports_excel() as export:
+            async for details in _reports(ROWS):
+                await export.add(details)
+            file = await export.save()
+            done.set()
+            await ticker
+            rows = await asyncio.to_thread(_read_rows, file)
+            self.assertEqual(len(rows), ROWS + 1)  # with header
+            self.assertEqual(rows[11][2:5], ("10€", "1€", "-9€"))
+
+        self.assertLess(max(lags), MAX_LAG)
+
+    async def test_error_of_reports_is_raised(self):
+        async def failing():
+            async for details in _reports(PAGE_SIZE):
+                yield details
+            raise ValueError("database is gone")
+
+        with self.assertRaisesRegex(ValueError, "database is gone"):
+            async with open_reports_excel() as export:
+                async for _ in export.passthrough(failing()):
+                    pass
+
+    async def test_passthrough_reports_are_exported(self):
+        async with open_reports_excel() as export:
+            sent = [d async for d in export.passthrough(_reports(PAGE_SIZE + 1))]
+            rows = await asyncio.to_thread(_read_rows, await export.save())
+        self.assertEqual(len(sent), PAGE_SIZE + 1)
+        self.assertEqual(len(rows), PAGE_SIZE + 2)  # with header
@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+
+from src.middlewares.fsm import BufferedFSMContext
+from src.services.database.storage import JSONRecordStorage
+
+
+class BufferedJSONStorageTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # file is written only on close, which tests don't call
+        self.storage = JSONRecordStorage("states.json")
+        self.storage.data = {}
+
+    async def test_update_reads_and_writes_record_once(self):
+        storage = self.storage
+        for method in ("get_state", "get_data", "set_state", "set_data"):
+            setattr(storage, method, mock.AsyncMock(side_effect=AssertionError))
+        storage.get_record = mock.AsyncMock(wraps=storage.get_record)
+        storage.set_record = mock.AsyncMock(wraps=storage.set_record)
+
+        context = BufferedFSMContext(storage, 1, 1)
+        self.assertIsNone(await context.load())
+        await context.update_data(amount=10)
+        await context.set_state("Form:amount")
+        await context.update_data(partner=2)
+        await context.flush()
+
+        storage.get_record.assert_awaited_once()
+        storage.set_record.assert_awaited_once()
+
+    async def test_record_round_trip(self):
+        context = BufferedFSMContext(self.storage, 1, 2)
+        await context.load()
+        await context.set_state("Form:amount")
+        await context.update_data(amount=10)
+        await context.flush()
+
+        context = BufferedFSMContext(self.storage, 1, 2)
+        self.assertEqual(await context.load(), "Form:amount")
+        self.assertEqual(await context.get_data(), {"amount": 10})
+
+        await context.reset_state()
+        await context.flush()
+        record = await self.storage.get_record(chat=1, user=2)
+        self.assertIsNone(record.state)
+        self.assertEqual(record.data, {})
@@ -0,0 +1,46 @@
+import asyncio
+
+from src.services import ledger
+from src.services.database import api
+from src.services.database.models import Charity, Currency, Salary, User
+from tests.database import DatabaseTestCase
+
+
+class PaySalariesTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await Currency.create(id=1, name="Euro", symbol="€", exchange_rate=1.0)
+        for user in (1, 2, 3):
+            await ledger.accept_user(user, "user{}".format(user))
+            await api.increment_salary(user, 10 * user)
+            await api.increment_charity(user, user)
+        inactive = await User.get(id=3)
+        await inactive.update(active=False)
+
+    async def test_pays_exactly_reset_amount(self):
+        paid = await ledger.pay_salaries(Salary, 1)
+        self.assertEqual(
+            [(user.id, user.balance, amount) for user, amount in paid], [(1, -10, 10)]
+        )
+        self.assertEqual(await ledger.pay_salaries(Salary, 1), [])
+        self.assertEqual((await User.get(id=1)).balance, -10)
+
+    async def test_pays_every_active_user(self):
+        paid = await ledger.pay_salaries(Salary)
+        self.assertEqual(
+            sorted((user.id, amount) for user, amount in paid), [(1, 10), (2, 20)]
+        )
+        salaries = {s.user: s.amount for s in await Salary.all()}
+        self.assertEqual(salaries, {1: 0, 2: 0, 3: 30})
+
+    async def test_concurrent_payments_debit_once(self):
+        results = await asyncio.gather(
+            *(ledger.pay_salaries(Salary, 2) for _ in range(5))
+        )
+        self.assertEqual(sum(len(paid) for paid in results), 1)
+        self.assertEqual((await User.get(id=2)).balance, -20)
+
+    async def test_charity_reset(self):
+        reset = await api.reset_amounts(Charity)
+        self.assertEqual(sorted(reset), [(1, 1), (2, 2), (3, 3)])
+        self.assertEqual({c.amount for c in await Charity.all()}, {0})
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.data import settings
+from src.services.database.models import Currency, User
+from src.services.database.tools import run_detached
+from tests.database import DatabaseTestCase
+
+
+class CachedModelTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await Currency.create(id=1, name="Euro", symbol="€", exchange_rate=1.0)
+        await Currency.create(id=2, name="Dollar", symbol="$", exchange_rate=1.1)
+        await User.create(id=1, username="user", currency=1, balance=0)
+
+    @mock.patch.object(settings, "CACHE_TTL", 60)
+    async def test_row_read_during_write_is_not_cached(self):
+        execute = AsyncSession.execute
+
+        async def execute_then_write(session, *args, **kwargs):
+            # writer commits after reader got old row, but before it is cached
+            result = await execute(session, *args, **kwargs)
+            with mock.patch.object(AsyncSession, "execute", execute):
+                user = await run_detached(User.get(id=1))
+                await run_detached(user.update(currency=2))
+            return result
+
+        with mock.patch.object(AsyncSession, "execute", execute_then_write):
+            stale = await User.get(id=1)
+        self.assertEqual(stale.currency, 1)
+        self.assertEqual((await User.get(id=1)).currency, 2)
+
+    async def test_update_of_outdated_copy_is_applied(self):
+        outdated = await User.get(id=1)
+        await User.increment_where(User.id == 1, balance=10)
+
+        await outdated.update(currency=2)
+        user = await User.get(id=1)
+        self.assertEqual((user.currency, user.balance), (2, 10))
@@ -0,0 +1,56 @@
+import datetime
+
+from src.services.database import api
+from src.services.database.config import engine
+from tests.database import DatabaseTestCase
+
+START = datetime.datetime(2024, 1, 1)
+END = START + datetime.timedelta(days=180)
+
+
+class ReportIndexesTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # a year of hourly reports, listings take half of it
+        await self.seed_reports(
+            users=50,
+            partners=30,
+            reports=24 * 365,
+            start=START,
+            step=datetime.timedelta(hours=1),
+        )
+
+    async def _explain(self, iterator) -> str:
+        """Plan of the first query iterator runs"""
+
+        with self.capture_queries() as queries:
+            async for _ in iterator:
+                pass
+        statement, parameters = queries[0]
+
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql("ANALYZE")
+            # tables are small, without this planner scans them whatever indexes exist
+            await connection.exec_driver_sql("SET enable_seqscan = off")
+            result = await connection.exec_driver_sql(
+                "EXPLAIN " + statement, parameters
+            )
+            return "\n".join(row[0] for row in result)
+
+    async def test_report_listings_use_indexes(self):
+        cases = (
+            ({}, "ix_report_created_at"),
+            ({"user": 1}, "ix_report_user_created_at"),
+            ({"partner": 2}, "ix_report_partner_created_at"),
+            ({"user": 1, "partner": 1}, "ix_report_user_partner_created_at"),
+        )
+        for kwargs, index in cases:
+            with self.subTest(index=index):
+                plan = await self._explain(
+                    api.iter_report_details_by_interval(START, END, **kwargs)
+                )
+                self.assertIn(index, plan)
+
+    async def test_operation_listing_uses_index(self):
+        plan = await self._explain(api.iter_operation_details_by_interval(START, END))
+        self.assertIn("ix_operation_created_at", plan)
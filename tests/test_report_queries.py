@@ -0,0 +1,46 @@
+import datetime
+
+from src.services.database import api
+from src.services.templates import render_template
+from tests.database import DatabaseTestCase
+
+START = datetime.datetime(2024, 1, 1)
+END = START + datetime.timedelta(days=30)
+BATCH = 25
+
+
+class ReportListingQueriesTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.seed_reports(users=4, partners=3, reports=120, start=START)
+
+    async def _list(self, **kwargs) -> tuple[int, int]:
+        """
+        Load listing and render every report like it is sent
+        :return: count of reports and count of queries
+        """
+
+        with self.capture_queries() as queries:
+            count = 0
+            async for details in api.iter_report_details_by_interval(
+                START, END, batch=BATCH, **kwargs
+            ):
+                count += 1
+                render_template(
+                    "admin/report.j2",
+                    context={
+                        "report": details.report,
+                        "partner": details.partner,
+                        "user": details.user,
+                        "currency": details.currency,
+                    },
+                )
+        return count, len(queries)
+
+    async def test_one_query_per_page(self):
+        for kwargs in ({}, {"user": 1}, {"partner": 2}, {"user": 2, "partner": 3}):
+            with self.subTest(**kwargs):
+                count, queries = await self._list(**kwargs)
+                self.assertGreater(count, 0)
+                # last page is shorter than batch or empty
+                self.assertEqual(queries, count // BATCH + 1)
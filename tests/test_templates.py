@@ -0,0 +1,33 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.services.templates import render_template
+
+TEMPLATE = """
+Пользователь: {{ username }}<br>
+Партнер: {{ partner }}.
+"""
+
+
+class RenderTemplateTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name)
+        (self.path / "user.j2").write_text(TEMPLATE, encoding="utf-8")
+
+    def _render(self, **context) -> str:
+        return render_template("user.j2", context=context, templates_path=self.path)
+
+    def test_source_new_lines_are_spaces_and_br_breaks_line(self):
+        self.assertEqual(
+            self._render(username="user", partner="partner"),
+            "Пользователь: user\nПартнер: partner.",
+        )
+
+    def test_new_lines_of_values_are_flattened(self):
+        self.assertEqual(
+            self._render(username="first\nsecond", partner="<b>\n  partner \n"),
+            "Пользователь: first second\nПартнер: &lt;b&gt; partner.",
+        )
@@ -0,0 +1,65 @@
+import asyncio
+from unittest import mock
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.dispatcher.handler import CancelHandler, current_handler
+
+from src.data import settings
+from src.middlewares.throttling import ThrottlingMiddleware
+from src.services.database.storage import PostgresStorage
+from src.services.database.tools import update_transaction
+from tests.database import DatabaseTestCase
+
+MESSAGE = {
+    "message_id": 1,
+    "date": 0,
+    "chat": {"id": 1, "type": "private"},
+    "from": {"id": 1, "is_bot": False, "first_name": "user"},
+    "text": "hello",
+}
+
+
+class PostgresThrottlingTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.bot = Bot(settings.BOT_TOKEN)
+        Dispatcher.set_current(Dispatcher(self.bot, storage=PostgresStorage()))
+        self.middleware = ThrottlingMiddleware(limit=60)
+        patcher = mock.patch.object(self.middleware, "message_throttled")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await (await self.bot.get_session()).close()
+        await super().asyncTearDown()
+
+    async def _process(self) -> bool:
+        """
+        Throttle message in its own update transaction
+        :return: is message passed
+        """
+
+        current_handler.set(None)
+        async with update_transaction():
+            try:
+                await self.middleware.on_process_message(types.Message(**MESSAGE), {})
+            except CancelHandler:
+                return False
+        return True
+
+    async def test_second_message_is_throttled(self):
+        self.assertTrue(await self._process())
+        self.assertFalse(await self._process())
+
+    async def test_concurrent_messages_pass_once(self):
+        get_record = PostgresStorage.get_record
+
+        async def slow_get_record(*args, **kwargs):
+            # other updates read bucket before this one writes it, unless locked
+            record = await get_record(*args, **kwargs)
+            await asyncio.sleep(0.05)
+            return record
+
+        with mock.patch.object(PostgresStorage, "get_record", slow_get_record):
+            passed = await asyncio.gather(*(self._process() for _ in range(5)))
+        self.assertEqual(passed.count(True), 1)
@@ -0,0 +1,44 @@
+from src.services.database.config import engine
+from src.services.database.models import Currency
+from src.services.database.tools import (
+    commit_update,
+    run_detached,
+    transaction,
+    update_transaction,
+)
+from tests.database import DatabaseTestCase
+
+
+async def _currencies() -> list[int]:
+    # own session, sees only committed rows
+    return [c.id for c in await run_detached(Currency.all())]
+
+
+class CommitUpdateTest(DatabaseTestCase):
+    async def test_commit_makes_writes_visible_and_releases_connection(self):
+        async with update_transaction():
+            await Currency.create(id=1, name="Euro", symbol="€", exchange_rate=1.0)
+            self.assertEqual(await _currencies(), [])
+
+            await commit_update()
+            self.assertEqual(await _currencies(), [1])
+            self.assertEqual(engine.pool.checkedout(), 0)
+
+            await Currency.create(id=2, name="Dollar", symbol="$", exchange_rate=1.1)
+        self.assertEqual(await _currencies(), [1, 2])
+
+    async def test_nested_transaction_is_not_committed_half_done(self):
+        async with update_transaction():
+            async with transaction():
+                await Currency.create(id=1, name="Euro", symbol="€", exchange_rate=1.0)
+                await commit_update()
+                self.assertEqual(await _currencies(), [])
+            self.assertEqual(await _currencies(), [])
+
+    async def test_does_nothing_outside_update(self):
+        await commit_update()
+        async with transaction():
+            await Currency.create(id=1, name="Euro", symbol="€", exchange_rate=1.0)
+            await commit_update()
+            self.assertEqual(await _currencies(), [])
+        self.assertEqual(await _currencies(), [1])
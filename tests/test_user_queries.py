@@ -0,0 +1,30 @@
+import datetime
+
+import sqlalchemy as sa
+
+from src.services.database import api
+from src.services.database.models import User
+from src.services.database.tools import session_scope
+from tests.database import DatabaseTestCase
+
+
+class SearchUsersTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.seed_reports(
+            users=4, partners=1, reports=1, start=datetime.datetime(2024, 1, 1)
+        )
+        async with session_scope() as session:
+            await session.execute(
+                sa.update(User).where(User.id == 2).values(is_admin=True)
+            )
+
+    async def _search(self, **kwargs) -> list[int]:
+        return [u.id for u in await api.search_users("USER", 10, **kwargs)]
+
+    async def test_search_by_prefix(self):
+        self.assertEqual(await self._search(), [1, 2, 3, 4])
+
+    async def test_search_admins(self):
+        self.assertEqual(await self._search(is_admin=True), [2])
+        self.assertEqual(await self._search(is_admin=False), [1, 3, 4])
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from aiogram import Bot, Dispatcher, types
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.data import settings
+from src.utils import webhook
+
+SECRET = "secret"
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "user"},
+        "text": "hello",
+    },
+}
+
+
+class WebhookTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch.object(settings, "WEBHOOK_SECRET", SECRET)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.bot = Bot(settings.BOT_TOKEN)
+        self.dispatcher = Dispatcher(self.bot)
+        self.received = []
+
+        @self.dispatcher.message_handler()
+        async def handle(message: types.Message):
+            self.received.append(message.text)
+
+        self.client = TestClient(TestServer(webhook.create_app(self.dispatcher)))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await (await self.bot.get_session()).close()
+
+    async def _post(self, headers: dict):
+        return await self.client.post(
+            settings.WEBHOOK_PATH, json=UPDATE, headers=headers
+        )
+
+    async def test_update_is_dispatched(self):
+        response = await self._post({webhook.SECRET_TOKEN_HEADER: SECRET})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.received, ["hello"])
+
+    async def test_update_without_secret_is_rejected(self):
+        for headers in ({}, {webhook.SECRET_TOKEN_HEADER: "wrong"}):
+            with self.subTest(headers=headers):
+                response = await self._post(headers)
+                self.assertEqual(response.status, 401)
+        self.assertEqual(self.received, [])
+
+    async def test_health(self):
+        response = await self.client.get("/health")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.json(), {"status": "ok"})
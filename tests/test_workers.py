@@ -0,0 +1,68 @@
+import functools
+import multiprocessing
+import os
+import signal
+import time
+import unittest
+
+from aiogram import Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from src.utils.workers import WorkerPool
+
+TIMEOUT = 30
+
+
+async def _on_startup(results: multiprocessing.Queue, dispatcher: Dispatcher):
+    async def handle(message: types.Message):
+        results.put((os.getpid(), message.message_id))
+
+    # no database and no state files, only dispatching
+    dispatcher.middleware.applications.clear()
+    dispatcher.storage = MemoryStorage()
+    dispatcher.register_message_handler(handle)
+    results.put((os.getpid(), None))
+
+
+async def _on_shutdown(dispatcher: Dispatcher):
+    pass
+
+
+def _update(number: int) -> types.Update:
+    return types.Update(
+        update_id=number,
+        message={
+            "message_id": number,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "user"},
+            "text": "hello",
+        },
+    )
+
+
+class WorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.results = multiprocessing.get_context("spawn").Queue()
+        self.pool = WorkerPool(
+            1, functools.partial(_on_startup, self.results), _on_shutdown
+        )
+        self.pool.start()
+        self.addCleanup(self.pool.stop)
+        self.pid, _ = self.results.get(timeout=TIMEOUT)
+
+    def test_dead_worker_is_restarted(self):
+        # let feeder thread of worker release lock of results queue
+        time.sleep(0.5)
+        os.kill(self.pid, signal.SIGKILL)
+        self.pool.processes[0].join(TIMEOUT)
+
+        self.pool.dispatch(_update(1))
+        pid, _ = self.results.get(timeout=TIMEOUT)
+        self.assertNotEqual(pid, self.pid)
+        self.assertEqual(self.results.get(timeout=TIMEOUT), (pid, 1))
+
+    def test_worker_ignores_sigterm(self):
+        os.kill(self.pid, signal.SIGTERM)
+        self.pool.dispatch(_update(1))
+        self.assertEqual(self.results.get(timeout=TIMEOUT), (self.pid, 1))